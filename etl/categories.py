@@ -0,0 +1,23 @@
+# Categorize Industries for better UX. Shared by the ETL, which publishes the
+# categories in the metadata manifest, and the dashboard, which imports this
+# module directly: keep it free of etl imports (etl.db needs mysql).
+def categorize_industry(name):
+    name = name.lower()
+    if any(x in name for x in ['motor', 'auto', 'gasoline', 'car']):
+        return "Automotive & Fuel"
+    elif any(x in name for x in ['food', 'beverage', 'grocery', 'beer', 'wine', 'liquor', 'supermarket', 'convenience']):
+        return "Food & Beverage"
+    elif any(x in name for x in ['clothing', 'shoe', 'jewelry', 'luggage', 'fashion']):
+        return "Clothing & Accessories"
+    elif any(x in name for x in ['furniture', 'electronic', 'appliance', 'furnishing']):
+        return "Home & Electronics"
+    elif any(x in name for x in ['building', 'garden', 'hardware']):
+        return "Building & Garden"
+    elif any(x in name for x in ['sporting', 'hobby', 'book', 'music']):
+        return "Hobbies & Leisure"
+    elif any(x in name for x in ['health', 'personal']):
+        return "Health & Personal Care"
+    elif 'retail trade' in name:
+        return "All Retail"
+    else:
+        return "General & Other"
@@ -0,0 +1,114 @@
+import os
+import time
+import threading
+import mysql.connector
+from mysql.connector import Error, errorcode, pooling
+from dotenv import load_dotenv
+
+load_dotenv()
+
+POOL_NAME = "etl"
+POOL_SIZE = int(os.getenv("ETL_DB_POOL_SIZE", 8))
+
+# Attempts to get a healthy connection before giving up, with exponential backoff between them
+CONNECT_RETRIES = int(os.getenv("ETL_DB_CONNECT_RETRIES", 5))
+CONNECT_BACKOFF = float(os.getenv("ETL_DB_CONNECT_BACKOFF", 1.0))
+MAX_BACKOFF = 30.0
+
+# How long to wait for a free connection when every pooled one is checked out
+POOL_WAIT_SECONDS = float(os.getenv("ETL_DB_POOL_WAIT", 60))
+
+# Applied to connections used for fact loads; pooled sessions are reset on release
+BULK_SESSION_SETTINGS = {
+    "innodb_lock_wait_timeout": 120,
+    "net_read_timeout": 600,
+    "net_write_timeout": 600,
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def db_config(with_database=True):
+    config = {
+        "host": os.getenv("DB_HOST", "localhost"),
+        "port": int(os.getenv("DB_PORT", 3306)),
+        "user": os.getenv("DB_USER", "root"),
+        "password": os.getenv("DB_PASSWORD", ""),
+        "allow_local_infile": True,
+    }
+    if with_database:
+        config["database"] = os.getenv("DB_NAME", "canadian_finance")
+    return config
+
+def create_database():
+    """Create the database if it doesn't exist"""
+    connection = mysql.connector.connect(**db_config(with_database=False))
+    try:
+        cursor = connection.cursor()
+        db_name = os.getenv("DB_NAME", "canadian_finance")
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS {db_name}")
+        print(f"Database {db_name} created successfully")
+        cursor.close()
+    finally:
+        connection.close()
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            try:
+                _pool = pooling.MySQLConnectionPool(
+                    pool_name=POOL_NAME, pool_size=POOL_SIZE, pool_reset_session=True, **db_config()
+                )
+            except Error as e:
+                if e.errno != errorcode.ER_BAD_DB_ERROR:
+                    raise
+                print("Database does not exist. Attempting to create it...")
+                create_database()
+                _pool = pooling.MySQLConnectionPool(
+                    pool_name=POOL_NAME, pool_size=POOL_SIZE, pool_reset_session=True, **db_config()
+                )
+        return _pool
+
+def _checkout(pool):
+    """
+    Takes a connection from the pool, waiting for one to be released if all are in use.
+    """
+    deadline = time.monotonic() + POOL_WAIT_SECONDS
+    while True:
+        try:
+            return pool.get_connection()
+        except pooling.PoolError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.1)
+
+def get_db_connection(bulk=False):
+    """
+    Returns a healthy connection from the process-wide pool, or None if the
+    database can't be reached after CONNECT_RETRIES attempts.
+    close() hands the connection back to the pool.
+    bulk=True applies BULK_SESSION_SETTINGS for long-running fact loads.
+    """
+    for attempt in range(1, CONNECT_RETRIES + 1):
+        conn = None
+        try:
+            conn = _checkout(_get_pool())
+            # Pooled connections can go stale between runs; ping reconnects them in place
+            conn.ping(reconnect=True, attempts=1)
+            if bulk:
+                cursor = conn.cursor()
+                for name, value in BULK_SESSION_SETTINGS.items():
+                    cursor.execute(f"SET SESSION {name} = %s", (value,))
+                cursor.close()
+            return conn
+        except Error as e:
+            print(f"Error connecting to MySQL (attempt {attempt}/{CONNECT_RETRIES}): {e}")
+            if conn is not None:
+                try:
+                    conn.close()
+                except Error:
+                    pass
+            if attempt == CONNECT_RETRIES:
+                return None
+            time.sleep(min(CONNECT_BACKOFF * 2 ** (attempt - 1), MAX_BACKOFF))
@@ -1,8 +1,24 @@
 import os
+import sys
+import json
+import time
+import random
+import hashlib
+import threading
+import shutil
+import resource
+import tempfile
 import requests
 import zipfile
 import io
 import pandas as pd
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+from etl.staging import parquet_enabled, is_stage_fresh, write_parquet_stage
+from etl.table_specs import TABLE_SPECS
 
 # Define the data directory
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data")
@@ -12,16 +28,330 @@ HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
 }
 
-def fetch_stats_can_data(table_id, output_filename):
+# Size of the pieces the HTTP body and zip member are copied in
+CHUNK_SIZE = 1024 * 1024
+
+# Overridable so the extractor can be pointed at a local stand-in server
+STATCAN_BASE_URL = os.getenv("STATCAN_BASE_URL", "https://www150.statcan.gc.ca/n1/tbl/csv")
+
+# Records ETag, Last-Modified, size and SHA-256 of the last download per table
+MANIFEST_PATH = os.path.join(DATA_DIR, "fetch_manifest.json")
+
+# Concurrency and retry settings for fetch_tables
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", 8))
+EXTRACT_PER_HOST = int(os.getenv("EXTRACT_PER_HOST", 4))
+MAX_RETRIES = int(os.getenv("EXTRACT_MAX_RETRIES", 5))
+BACKOFF_BASE = float(os.getenv("EXTRACT_BACKOFF_BASE", 1.0))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Seconds to connect, and to wait for each piece of the body, before retrying
+CONNECT_TIMEOUT = float(os.getenv("EXTRACT_CONNECT_TIMEOUT", 10))
+READ_TIMEOUT = float(os.getenv("EXTRACT_READ_TIMEOUT", 60))
+# Transient failures: refused/reset connections, timeouts, and bodies cut short
+RETRY_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+# Every registered table spec is fetched (Consumer Price Index, retail trade
+# sales by industry, monthly retail trade sales by province, ...)
+TASKS = [(spec.table_id, spec.filename) for spec in TABLE_SPECS.values()]
+
+# Worker threads share the manifest file and the per-host limits
+_MANIFEST_LOCK = threading.Lock()
+_HOST_LIMITS = {}
+_HOST_LIMITS_LOCK = threading.Lock()
+
+def peak_rss_mb():
+    """
+    Returns the peak resident set size of this process in MB.
+    ru_maxrss is reported in KB on Linux and in bytes on macOS.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+def load_manifest(manifest_path=MANIFEST_PATH):
+    """
+    Reads the fetch cache manifest. Returns an empty dict if it is missing or unreadable.
+    """
+    try:
+        with open(manifest_path, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def save_manifest(manifest, manifest_path=MANIFEST_PATH):
+    """
+    Writes the manifest atomically so an interrupted run cannot corrupt it.
+    """
+    partial_path = manifest_path + ".part"
+    with open(partial_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(partial_path, manifest_path)
+
+def build_session(pool_size=EXTRACT_WORKERS):
+    """
+    Creates a requests.Session whose connection pool is large enough
+    for every worker to keep its own keep-alive connection.
+    """
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def _host_limit(url, per_host_limit):
+    key = (urlsplit(url).netloc, per_host_limit)
+    with _HOST_LIMITS_LOCK:
+        if key not in _HOST_LIMITS:
+            _HOST_LIMITS[key] = threading.BoundedSemaphore(per_host_limit)
+        return _HOST_LIMITS[key]
+
+def _retry_delay(response, attempt):
+    """
+    Exponential backoff with jitter, honouring a numeric Retry-After header.
+    """
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    return BACKOFF_BASE * (2 ** attempt) + random.uniform(0, BACKOFF_BASE)
+
+def _download_with_retry(session, url, headers, target, max_retries=MAX_RETRIES):
+    """
+    Streams a GET of url into the open binary file target, retrying on 429/5xx
+    responses and on RETRY_ERRORS, whether raised by the request or while the
+    body is read; a retry rewrites target from the start.
+    Returns the (closed) response and the SHA-256 of the body. A 304 is
+    returned without reading a body; other error statuses raise HTTPError.
+    """
+    for attempt in range(max_retries + 1):
+        response = None
+        try:
+            response = session.get(url, headers=headers, stream=True, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+            if response.status_code in RETRY_STATUSES and attempt < max_retries:
+                print(f"Got HTTP {response.status_code} for {url}, retrying...")
+            else:
+                with response:
+                    digest = hashlib.sha256()
+                    if response.status_code != 304:
+                        response.raise_for_status()
+                        target.seek(0)
+                        target.truncate()
+                        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                            target.write(chunk)
+                            digest.update(chunk)
+                        target.flush()
+                return response, digest.hexdigest()
+        except RETRY_ERRORS as e:
+            if attempt == max_retries:
+                raise
+            print(f"{type(e).__name__} for {url}: {e}, retrying...")
+        delay = _retry_delay(response, attempt)
+        if response is not None:
+            response.close()
+        time.sleep(delay)
+
+def _ensure_stage(csv_path, changed):
+    """
+    Refreshes the Parquet staging copy when the CSV changed or the copy is missing.
+    A staging failure is not fatal: transformers fall back to the CSV.
+    """
+    if not parquet_enabled() or (not changed and is_stage_fresh(csv_path)):
+        return
+    try:
+        write_parquet_stage(csv_path)
+    except Exception as e:
+        print(f"Could not stage {csv_path} as Parquet, transformers will read the CSV: {e}")
+
+def _conditional_headers(entry):
+    headers = dict(HEADERS)
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+def fetch_stats_can_data(table_id, output_filename, stream=True, use_cache=True,
+                         base_url=None, manifest_path=MANIFEST_PATH, session=None,
+                         per_host_limit=EXTRACT_PER_HOST):
     """
     Fetches data from Statistics Canada using direct CSV URL
     and saves it to a CSV file.
+
+    In streaming mode (default) the zip is written to a temporary file in
+    chunks and the member CSV is copied straight into DATA_DIR, so memory use
+    stays flat regardless of table size.
+
+    With use_cache, the request is conditional on the ETag/Last-Modified
+    recorded in the manifest. On a 304, or when the downloaded zip hashes to
+    the recorded SHA-256, extraction is skipped and the result is marked
+    unchanged so downstream stages can skip the table too.
+
+    Pass a shared session to reuse pooled connections (one created here is
+    closed again); transient 429/5xx responses, connection errors, timeouts
+    and interrupted bodies are retried with exponential backoff, and at most
+    per_host_limit downloads run against one host at a time.
+
+    Returns a dict with the output path, 'changed' flag and transfer stats,
+    or None on failure.
+    With stream=False the legacy in-memory path is used and a DataFrame is returned.
     """
-    url = f"https://www150.statcan.gc.ca/n1/tbl/csv/{table_id}-eng.zip"
+    if not stream:
+        return _fetch_in_memory(table_id, output_filename)
+
+    url = f"{base_url or STATCAN_BASE_URL}/{table_id}-eng.zip"
+    print(f"Fetching {table_id} from {url}...")
+
+    output_path = os.path.join(DATA_DIR, output_filename)
+    own_session = session is None
+    if own_session:
+        session = build_session(pool_size=1)
+    with _MANIFEST_LOCK:
+        manifest = load_manifest(manifest_path) if use_cache else {}
+    entry = manifest.get(table_id, {})
+    # A cache entry is only usable if the file it describes is still on disk
+    if entry.get("output_filename") != output_filename or not os.path.exists(output_path):
+        entry = {}
+
+    stats = {
+        "table_id": table_id,
+        "path": output_path,
+        "changed": True,
+        "status": "downloaded",
+        "download_bytes": 0,
+        "seconds": 0.0,
+        "bytes_per_sec": 0.0,
+    }
+    tmp_zip = tempfile.NamedTemporaryFile(dir=DATA_DIR, prefix=f".{table_id}-", suffix=".zip", delete=False)
+    start = time.perf_counter()
+    try:
+        with tmp_zip, _host_limit(url, per_host_limit):
+            response, sha256 = _download_with_retry(session, url, _conditional_headers(entry), tmp_zip)
+        if response.status_code == 304 and entry:
+            stats.update(changed=False, status="not_modified", sha256=entry["sha256"])
+            print(f"{table_id} not modified since last fetch, skipping.")
+            _ensure_stage(output_path, changed=False)
+            return stats
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        download_bytes = os.path.getsize(tmp_zip.name)
+        download_secs = time.perf_counter() - start
+        stats.update(
+            sha256=sha256,
+            download_bytes=download_bytes,
+            bytes_per_sec=download_bytes / download_secs if download_secs > 0 else 0.0,
+        )
+
+        if entry.get("sha256") == sha256:
+            stats.update(changed=False, status="unchanged")
+            print(f"{table_id} content unchanged (sha256 {sha256[:12]}), skipping extraction.")
+        else:
+            with zipfile.ZipFile(tmp_zip.name) as z:
+                # The zip usually contains {table_id}.csv and metadata
+                csv_name = f"{table_id}.csv"
+                if csv_name not in z.namelist():
+                    print(f"Could not find {csv_name} in zip file. Available: {z.namelist()}")
+                    return None
+
+                print(f"Extracting {csv_name}...")
+                # Write next to the target and rename, so readers never see a partial file
+                partial_path = output_path + ".part"
+                try:
+                    with z.open(csv_name) as source_file, open(partial_path, "wb") as target_file:
+                        shutil.copyfileobj(source_file, target_file, CHUNK_SIZE)
+                    os.replace(partial_path, output_path)
+                finally:
+                    # Only left behind if the copy failed (e.g. a corrupt zip or a full disk)
+                    if os.path.exists(partial_path):
+                        os.remove(partial_path)
+
+        _ensure_stage(output_path, stats["changed"])
+
+        if use_cache:
+            now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+            with _MANIFEST_LOCK:
+                # Re-read under the lock so concurrent fetches don't drop each other's entries
+                manifest = load_manifest(manifest_path)
+                manifest[table_id] = {
+                    "output_filename": output_filename,
+                    "etag": etag,
+                    "last_modified": last_modified,
+                    "size": download_bytes,
+                    "sha256": sha256,
+                    "fetched_at": now,
+                    "changed_at": now if stats["changed"] else entry.get("changed_at", now),
+                }
+                save_manifest(manifest, manifest_path)
+
+        stats.update(
+            csv_bytes=os.path.getsize(output_path),
+            seconds=time.perf_counter() - start,
+            peak_rss_mb=peak_rss_mb(),
+        )
+        action = "Saved" if stats["changed"] else "Kept"
+        print(
+            f"{action} {table_id} at {output_path} "
+            f"({stats['download_bytes'] / 1e6:.1f} MB zip, {stats['csv_bytes'] / 1e6:.1f} MB csv, "
+            f"{stats['bytes_per_sec'] / 1e6:.2f} MB/s, peak RSS {stats['peak_rss_mb']:.0f} MB)"
+        )
+        return stats
+
+    except Exception as e:
+        print(f"Error fetching {table_id}: {e}")
+        return None
+    finally:
+        if os.path.exists(tmp_zip.name):
+            os.remove(tmp_zip.name)
+        if own_session:
+            session.close()
+
+def fetch_tables(tasks=TASKS, max_workers=EXTRACT_WORKERS, per_host_limit=EXTRACT_PER_HOST, **kwargs):
+    """
+    Fetches several tables concurrently on a bounded thread pool that shares
+    one pooled session. Returns {table_id: result} and prints per-table latency.
+    """
+    session = build_session(pool_size=max_workers)
+    results = {}
+    latencies = {}
+    start = time.perf_counter()
+
+    def _timed_fetch(table_id, filename):
+        t0 = time.perf_counter()
+        result = fetch_stats_can_data(
+            table_id, filename, session=session, per_host_limit=per_host_limit, **kwargs
+        )
+        return result, time.perf_counter() - t0
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(_timed_fetch, table_id, filename): table_id
+                for table_id, filename in tasks
+            }
+            for future in as_completed(futures):
+                table_id = futures[future]
+                results[table_id], latencies[table_id] = future.result()
+    finally:
+        session.close()
+
+    wall = time.perf_counter() - start
+    print("\nExtraction summary:")
+    for table_id, _ in tasks:
+        result = results.get(table_id)
+        status = result["status"] if result else "failed"
+        print(f"  {table_id}: {status:<12} {latencies[table_id]:7.2f}s")
+    print(f"  wall clock {wall:.2f}s vs {sum(latencies.values()):.2f}s sequential sum")
+    return results
+
+def _fetch_in_memory(table_id, output_filename):
+    """
+    Original extraction path: buffers the zip, parses it with pandas
+    and writes it back out. Kept for comparison and as a fallback.
+    """
+    url = f"{STATCAN_BASE_URL}/{table_id}-eng.zip"
     print(f"Fetching {table_id} from {url}...")
     
     try:
-        response = requests.get(url, headers=HEADERS)
+        response = requests.get(url, headers=HEADERS, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
         response.raise_for_status()
         
         # Open the zip file
@@ -36,7 +366,7 @@ def fetch_stats_can_data(table_id, output_filename):
                     
                 output_path = os.path.join(DATA_DIR, output_filename)
                 df.to_csv(output_path, index=False)
-                print(f"Saved {table_id} to {output_path}")
+                print(f"Saved {table_id} to {output_path} (peak RSS {peak_rss_mb():.0f} MB)")
                 return df
             else:
                 print(f"Could not find {csv_name} in zip file. Available: {z.namelist()}")
@@ -47,13 +377,7 @@ def fetch_stats_can_data(table_id, output_filename):
         return None
 
 if __name__ == "__main__":
-    # Table IDs from the design document
-    
-    tasks = [
-        ("18100004", "cpi_monthly.csv"),           # Consumer Price Index
-        ("20100008", "retail_sales_industry.csv"), # Retail trade sales by industry
-        ("20100056", "retail_sales_province.csv")  # Monthly retail trade sales by province
-    ]
-    
-    for table_id, filename in tasks:
-        fetch_stats_can_data(table_id, filename)
+    results = fetch_tables(TASKS)
+    changed = [table_id for table_id, result in results.items() if result and result["changed"]]
+
+    print(f"Changed tables: {', '.join(changed) if changed else 'none'}")
@@ -1,53 +1,56 @@
 import os
-import mysql.connector
+import sys
 from mysql.connector import Error
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from etl.db import get_db_connection
+from etl.migrate import split_sql, apply_migrations
+from etl.table_specs import fact_tables, fact_key_columns
 
-def get_db_connection():
+def ensure_natural_keys(conn):
     """
-    Establishes a connection to the MySQL database.
-    Retries or manages connection parameters from .env
+    Adds the natural unique key (date, geography, product/industry) to fact
+    tables created before it was part of schema.sql. Duplicate rows left by
+    earlier append-only loads are removed first, keeping the newest copy.
     """
-    try:
-        connection = mysql.connector.connect(
-            host=os.getenv("DB_HOST", "localhost"),
-            port=int(os.getenv("DB_PORT", 3306)),
-            user=os.getenv("DB_USER", "root"),
-            password=os.getenv("DB_PASSWORD", ""),
-            database=os.getenv("DB_NAME", "canadian_finance")
-        )
-        if connection.is_connected():
-            return connection
-    except Error as e:
-        print(f"Error connecting to MySQL: {e}")
-        # If database doesn't exist, try connecting without it to create it
-        if "Unknown database" in str(e):
-            print("Database does not exist. Attempting to create it...")
-            create_database()
-            return get_db_connection()
-        return None
+    cursor = conn.cursor()
+    for table in fact_tables():
+        key_columns = fact_key_columns(table)
+        index_name = f"uq_{table}_natural"
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+        """, (table, index_name))
+        if cursor.fetchone()[0]:
+            continue
 
-def create_database():
-    """Create the database if it doesn't exist"""
-    try:
-        connection = mysql.connector.connect(
-            host=os.getenv("DB_HOST", "localhost"),
-            port=int(os.getenv("DB_PORT", 3306)),
-            user=os.getenv("DB_USER", "root"),
-            password=os.getenv("DB_PASSWORD", "")
-        )
-        if connection.is_connected():
-            cursor = connection.cursor()
-            db_name = os.getenv("DB_NAME", "canadian_finance")
-            cursor.execute(f"CREATE DATABASE IF NOT EXISTS {db_name}")
-            print(f"Database {db_name} created successfully")
-            cursor.close()
-            connection.close()
-    except Error as e:
-        print(f"Error creating database: {e}")
+        cursor.execute("""
+            SELECT column_name FROM information_schema.key_column_usage
+            WHERE table_schema = DATABASE() AND table_name = %s AND constraint_name = 'PRIMARY'
+        """, (table,))
+        row = cursor.fetchone()
+        if row is None:
+            # Table doesn't exist yet; schema.sql will create it with the key
+            continue
+        pk = row[0]
+
+        print(f"Adding natural key {index_name} to {table}...")
+        keys = ', '.join(key_columns)
+        join = ' AND '.join(f"f.{c} = d.{c}" for c in key_columns)
+        cursor.execute(f"""
+            DELETE f FROM {table} f
+            JOIN (
+                SELECT {keys}, MAX({pk}) AS keep_id
+                FROM {table}
+                GROUP BY {keys}
+                HAVING COUNT(*) > 1
+            ) d ON {join}
+            WHERE f.{pk} <> d.keep_id
+        """)
+        print(f"Removed {cursor.rowcount} duplicate rows from {table}.")
+        cursor.execute(f"ALTER TABLE {table} ADD UNIQUE KEY {index_name} ({keys})")
+        conn.commit()
+    cursor.close()
 
 def init_schema():
     """Reads the schema.sql and applies it to the database"""
@@ -66,18 +69,18 @@ def init_schema():
         with open(schema_path, "r") as f:
             schema_sql = f.read()
         
-        # Split by semicolon to execute individual statements
-        # This is a simple parser, might need robustness for complex SQL
-        statements = schema_sql.split(';')
-        for statement in statements:
-            if statement.strip():
-                try:
-                    cursor.execute(statement)
-                except Error as err:
-                    print(f"Error executing statement: {err}")
-                    print(f"Statement: {statement[:50]}...")
+        # Split on top-level semicolons (quotes and comments are respected)
+        for statement in split_sql(schema_sql):
+            try:
+                cursor.execute(statement)
+            except Error as err:
+                print(f"Error executing statement: {err}")
+                print(f"Statement: {statement[:50]}...")
         
         conn.commit()
+        ensure_natural_keys(conn)
+        # Everything after the baseline schema lives in sql/migrations
+        apply_migrations(conn)
         print("Schema applied successfully.")
     except Exception as e:
         print(f"Error applying schema: {e}")
@@ -0,0 +1,155 @@
+import time
+import threading
+import pandas as pd
+
+# Months per DELETE / INSERT ... SELECT, to keep IN (...) lists reasonable
+MONTHS_PER_STATEMENT = 500
+
+AGGREGATES = {}
+
+# CPI and retail can load concurrently and both feed agg_real_sales;
+# rewriting the same months from two connections would only deadlock
+_REFRESH_LOCK = threading.Lock()
+
+def register_aggregate(name, source_tables, refresh):
+    """
+    Registers a summary table rebuilt from `source_tables` after they load.
+    refresh(cursor, months) rewrites the rows for the given month-start dates.
+    """
+    AGGREGATES[name] = (tuple(source_tables), refresh)
+
+def _chunks(months):
+    for i in range(0, len(months), MONTHS_PER_STATEMENT):
+        yield months[i:i + MONTHS_PER_STATEMENT]
+
+def _in_list(months):
+    return ', '.join(['%s'] * len(months))
+
+# ---- agg_retail_yoy ----
+
+RETAIL_YOY_SELECT = """
+    SELECT
+        c.geo_id,
+        c.industry_id,
+        dc.full_date,
+        c.value,
+        p.value,
+        CASE WHEN p.value <> 0 THEN (c.value - p.value) / p.value * 100 END
+    FROM fact_retail_sales c
+    JOIN dim_date dc ON c.date_id = dc.date_id
+    LEFT JOIN dim_date dp ON dp.full_date = DATE_SUB(dc.full_date, INTERVAL 1 YEAR)
+    LEFT JOIN fact_retail_sales p
+        ON p.date_id = dp.date_id AND p.geo_id = c.geo_id AND p.industry_id = c.industry_id
+"""
+
+def refresh_retail_yoy(cursor, months):
+    """
+    Recomputes agg_retail_yoy for `months` (all of it if None). Callers include
+    the month a year after each loaded one, since its prior-year value changed too.
+    """
+    insert = "INSERT INTO agg_retail_yoy (geo_id, industry_id, ref_month, current_value, prev_value, yoy_growth) "
+    if months is None:
+        cursor.execute("DELETE FROM agg_retail_yoy")
+        cursor.execute(insert + RETAIL_YOY_SELECT)
+        return
+    for batch in _chunks(months):
+        cursor.execute(f"DELETE FROM agg_retail_yoy WHERE ref_month IN ({_in_list(batch)})", batch)
+        cursor.execute(insert + RETAIL_YOY_SELECT + f" WHERE dc.full_date IN ({_in_list(batch)})", batch)
+
+register_aggregate('agg_retail_yoy', ['fact_retail_sales'], refresh_retail_yoy)
+
+# ---- agg_real_sales ----
+
+REAL_SALES_SELECT = """
+    SELECT
+        s.geo_id,
+        s.industry_id,
+        ds.full_date,
+        s.value,
+        c.value,
+        CASE WHEN c.value <> 0 THEN s.value / (c.value / 100) END,
+        CASE WHEN ps.value <> 0 THEN (s.value - ps.value) / ps.value * 100 END,
+        CASE WHEN pc.value <> 0 THEN (c.value - pc.value) / pc.value * 100 END,
+        CASE WHEN c.value <> 0 AND ps.value <> 0 AND pc.value <> 0
+             THEN ((s.value / c.value) / (ps.value / pc.value) - 1) * 100 END
+    FROM fact_retail_sales s
+    JOIN dim_date ds ON s.date_id = ds.date_id
+    JOIN dim_product ap ON ap.product_name = 'All-items'
+    JOIN fact_cpi c ON c.date_id = s.date_id AND c.geo_id = s.geo_id AND c.product_id = ap.product_id
+    LEFT JOIN dim_date dp ON dp.full_date = DATE_SUB(ds.full_date, INTERVAL 1 YEAR)
+    LEFT JOIN fact_retail_sales ps
+        ON ps.date_id = dp.date_id AND ps.geo_id = s.geo_id AND ps.industry_id = s.industry_id
+    LEFT JOIN fact_cpi pc
+        ON pc.date_id = dp.date_id AND pc.geo_id = s.geo_id AND pc.product_id = ap.product_id
+"""
+
+def refresh_real_sales(cursor, months):
+    """
+    Recomputes agg_real_sales (nominal, All-items CPI and deflated sales with
+    their YoY changes) for `months`, or all of it if None.
+    Only (geo, industry, month) rows with a matching CPI value are kept.
+    """
+    insert = (
+        "INSERT INTO agg_real_sales "
+        "(geo_id, industry_id, ref_month, sales, cpi, real_sales, sales_yoy, cpi_yoy, real_sales_yoy) "
+    )
+    if months is None:
+        cursor.execute("DELETE FROM agg_real_sales")
+        cursor.execute(insert + REAL_SALES_SELECT)
+        return
+    for batch in _chunks(months):
+        cursor.execute(f"DELETE FROM agg_real_sales WHERE ref_month IN ({_in_list(batch)})", batch)
+        cursor.execute(insert + REAL_SALES_SELECT + f" WHERE ds.full_date IN ({_in_list(batch)})", batch)
+
+register_aggregate('agg_real_sales', ['fact_cpi', 'fact_retail_sales'], refresh_real_sales)
+
+# ---- Refresh ----
+
+def affected_months(conn, date_ids):
+    """
+    Month-start dates a load of `date_ids` can change in a YoY summary:
+    each loaded month plus the month a year after it.
+    """
+    date_ids = [int(i) for i in date_ids]
+    if not date_ids:
+        return []
+    cursor = conn.cursor()
+    dates = []
+    for i in range(0, len(date_ids), MONTHS_PER_STATEMENT):
+        batch = date_ids[i:i + MONTHS_PER_STATEMENT]
+        cursor.execute(f"SELECT full_date FROM dim_date WHERE date_id IN ({_in_list(batch)})", batch)
+        dates += [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    loaded = pd.DatetimeIndex(dates)
+    months = loaded.union(loaded + pd.DateOffset(years=1))
+    return [d.date() for d in months]
+
+def refresh_aggregates(conn, fact_table, date_ids=None):
+    """
+    Brings every summary built from `fact_table` up to date after a load.
+    With date_ids, only the months those rows (and their YoY successors) fall in
+    are rewritten; without, the summaries are rebuilt from scratch.
+    Each summary is rewritten in one transaction, so readers see either the
+    old or the new rows for a month, never neither.
+    """
+    months = None
+    if date_ids is not None:
+        months = affected_months(conn, date_ids)
+        if not months:
+            return
+    for name, (sources, refresh) in AGGREGATES.items():
+        if fact_table not in sources:
+            continue
+        start = time.perf_counter()
+        with _REFRESH_LOCK:
+            cursor = conn.cursor()
+            try:
+                refresh(cursor, months)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+        scope = "all months" if months is None else f"{len(months)} months"
+        print(f"Refreshed {name} for {scope} in {time.perf_counter() - start:.1f}s.")
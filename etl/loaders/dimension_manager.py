@@ -0,0 +1,105 @@
+import os
+import sys
+import threading
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+from etl.table_specs import DIMENSIONS
+
+# Rows per multi-row INSERT / keys per IN (...) lookup, to stay under max_allowed_packet
+STATEMENT_ROWS = 5000
+
+class DimensionManager:
+    """
+    Process-wide {natural key: surrogate id} maps for every dimension.
+
+    Each map is read from MySQL once. After that, ensure() inserts only members
+    the map doesn't know yet, in one multi-row INSERT IGNORE per dimension, and
+    reads back ids for just those members. All fact loads in the process share
+    the maps instead of re-SELECTing whole dimension tables.
+    """
+
+    def __init__(self):
+        self._maps = {}
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self._maps.clear()
+
+    def id_map(self, conn, dim_name):
+        """
+        Returns the id map for a dimension, loading it on first use.
+        Dates are keyed by Timestamp so they line up with the transformed 'date' column.
+        """
+        with self._lock:
+            if dim_name not in self._maps:
+                dim = DIMENSIONS[dim_name]
+                cursor = conn.cursor()
+                cursor.execute(f"SELECT {dim.key_column}, {dim.id_column} FROM {dim.table}")
+                self._maps[dim_name] = {self._key(dim_name, k): i for k, i in cursor.fetchall()}
+                cursor.close()
+            return self._maps[dim_name]
+
+    def ensure(self, conn, dim_name, values):
+        """
+        Makes sure every value is a member of the dimension. Returns the number of new members.
+        """
+        known = self.id_map(conn, dim_name)
+        missing = sorted({self._key(dim_name, v) for v in values} - known.keys())
+        dim = DIMENSIONS[dim_name]
+        if not missing:
+            print(f"{dim.table}: no new members.")
+            return 0
+
+        columns, rows = self._member_rows(dim_name, missing)
+        placeholders = f"({', '.join(['%s'] * len(columns))})"
+        cursor = conn.cursor()
+        for i in range(0, len(rows), STATEMENT_ROWS):
+            batch = rows[i:i + STATEMENT_ROWS]
+            params = [value for row in batch for value in row]
+            cursor.execute(
+                f"INSERT IGNORE INTO {dim.table} ({', '.join(columns)}) "
+                f"VALUES {', '.join([placeholders] * len(batch))}",
+                params
+            )
+        conn.commit()
+
+        # Refresh only the members we just inserted (or that another process beat us to)
+        keys = [row[0] for row in rows]
+        fresh = {}
+        for i in range(0, len(keys), STATEMENT_ROWS):
+            batch = keys[i:i + STATEMENT_ROWS]
+            cursor.execute(
+                f"SELECT {dim.key_column}, {dim.id_column} FROM {dim.table} "
+                f"WHERE {dim.key_column} IN ({', '.join(['%s'] * len(batch))})",
+                batch
+            )
+            fresh.update({self._key(dim_name, k): i for k, i in cursor.fetchall()})
+        cursor.close()
+
+        with self._lock:
+            known.update(fresh)
+        print(f"{dim.table}: added {len(missing)} new members.")
+        return len(missing)
+
+    @staticmethod
+    def _key(dim_name, value):
+        return pd.Timestamp(value) if dim_name == 'date' else value
+
+    @staticmethod
+    def _member_rows(dim_name, keys):
+        """
+        Builds INSERT rows for new members; dates get their calendar attributes in one vectorized pass.
+        """
+        if dim_name == 'date':
+            dates = pd.DatetimeIndex(keys)
+            columns = ['full_date', 'year', 'month', 'quarter']
+            rows = list(zip(dates.date.tolist(), dates.year.tolist(), dates.month.tolist(), dates.quarter.tolist()))
+            return columns, rows
+        return [DIMENSIONS[dim_name].key_column], [(key,) for key in keys]
+
+_manager = DimensionManager()
+
+def get_dimension_manager():
+    return _manager
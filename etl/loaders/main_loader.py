@@ -1,165 +1,133 @@
 import os
+import csv
 import sys
+import time
+import tempfile
+import threading
+import numpy as np
 import pandas as pd
-import mysql.connector
 from mysql.connector import Error
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
 
 # Add etl to path to import transformers
 sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
-from etl.transformers.main_transformer import transform_cpi, transform_retail_industry, transform_retail_province
+from etl.db import get_db_connection
+from etl.table_specs import TABLE_SPECS, DIMENSIONS, PARTITION_COLUMN, fact_key_columns, specs_for_fact_table
+from etl.init_mysql import ensure_natural_keys
+from etl.migrate import apply_migrations
+from etl.metadata import current_load_version, publish_manifest
+from etl.parquet_export import try_export_warehouse
+from etl.loaders.dimension_manager import get_dimension_manager
+from etl.loaders.aggregates import refresh_aggregates
+from etl.loaders.shadow_tables import prepare_shadow_table, finish_shadow_table
+from etl.transformers.main_transformer import transform_table, iter_transform_table
 
-load_dotenv()
+# 'insert' uses batched executemany, 'bulk' uses LOAD DATA LOCAL INFILE,
+# 'incremental' only writes rows that are new or changed since the last load,
+# 'swap' bulk-loads a fresh fact_*_next table and renames it over the live one
+LOAD_MODES = ('insert', 'bulk', 'incremental', 'swap')
+LOAD_MODE = os.getenv("ETL_LOAD_MODE", "insert")
 
-def get_db_connection():
-    try:
-        connection = mysql.connector.connect(
-            host=os.getenv("DB_HOST", "localhost"),
-            port=int(os.getenv("DB_PORT", 3306)),
-            user=os.getenv("DB_USER", "root"),
-            password=os.getenv("DB_PASSWORD", ""),
-            database=os.getenv("DB_NAME", "canadian_finance")
-        )
-        return connection
-    except Error as e:
-        print(f"Error connecting to MySQL: {e}")
-        return None
-
-def load_dim_geography(conn, df_list):
-    """
-    Extracts unique geography names from all dataframes and loads into dim_geography
-    """
-    print("Loading dim_geography...")
-    unique_geos = set()
-    for df in df_list:
-        unique_geos.update(df['geography'].unique())
-    
-    cursor = conn.cursor()
-    count = 0
-    for geo in unique_geos:
-        try:
-            # Insert ignore to skip duplicates
-            cursor.execute("INSERT IGNORE INTO dim_geography (province_name) VALUES (%s)", (geo,))
-            count += 1
-        except Error as e:
-            print(f"Error inserting geo {geo}: {e}")
-    conn.commit()
-    cursor.close()
-    print(f"Processed {count} geographies.")
+# Server/client errors meaning LOAD DATA LOCAL is switched off somewhere
+LOCAL_INFILE_DISABLED_ERRORS = {1148, 2068, 3948}
+
+# Connections used to load fact partitions concurrently; 1 keeps everything on one connection.
+# They come from the etl.db pool, so keep ETL_DB_POOL_SIZE above this plus one per fact table
+LOAD_WORKERS = int(os.getenv("ETL_LOAD_WORKERS", 1))
 
-def load_dim_product(conn, df):
+# Deadlock / lock wait timeout: safe to retry the partition
+RETRYABLE_LOAD_ERRORS = {1205, 1213}
+PARTITION_RETRIES = 3
+
+def load_dimensions(conn, frames):
     """
-    Extracts unique products from CPI dataframe and loads into dim_product
+    Collects the distinct members of every dimension bound by the given
+    (spec, DataFrame) pairs and upserts any new ones, one statement per dimension.
     """
-    print("Loading dim_product...")
-    unique_products = df['product'].unique()
-    cursor = conn.cursor()
-    count = 0
-    for prod in unique_products:
-        try:
-            cursor.execute("INSERT IGNORE INTO dim_product (product_name) VALUES (%s)", (prod,))
-            count += 1
-        except Error as e:
-            print(f"Error inserting product {prod}: {e}")
-    conn.commit()
-    cursor.close()
-    print(f"Processed {count} products.")
+    members = {}
+    for spec, df in frames:
+        for column, dim_name in spec.dimensions.items():
+            members.setdefault(dim_name, set()).update(df[column].unique())
+
+    dimensions = get_dimension_manager()
+    for dim_name, values in members.items():
+        dimensions.ensure(conn, dim_name, values)
 
-def load_dim_industry(conn, df_list):
+def _lookup_ids(series, id_map):
     """
-    Extracts unique industries from retail dataframes and loads into dim_industry
+    Vectorized dimension lookup: returns an int64 array of ids, with 0 where the key is unmapped.
     """
-    print("Loading dim_industry...")
-    unique_inds = set()
-    for df in df_list:
-        unique_inds.update(df['industry'].unique())
-        
-    cursor = conn.cursor()
-    count = 0
-    for ind in unique_inds:
-        try:
-            cursor.execute("INSERT IGNORE INTO dim_industry (industry_name) VALUES (%s)", (ind,))
-            count += 1
-        except Error as e:
-            print(f"Error inserting industry {ind}: {e}")
-    conn.commit()
-    cursor.close()
-    print(f"Processed {count} industries.")
+    if not id_map:
+        return np.zeros(len(series), dtype=np.int64)
+    keys = pd.Index(list(id_map.keys()))
+    ids = np.fromiter(id_map.values(), dtype=np.int64, count=len(id_map))
+    positions = keys.get_indexer(series)
+    return np.where(positions >= 0, ids[positions], 0)
 
-def load_dim_date(conn, df_list):
+def map_fact_frame(spec, df, maps):
     """
-    Extracts unique dates and loads into dim_date
+    Maps a normalized frame to fact columns with joins against the dimension maps
+    ({dimension name: id map}). Returns (fact frame in spec.fact_columns order,
+    unmapped) where unmapped counts, per frame column, the rows whose key had no id.
     """
-    print("Loading dim_date...")
-    unique_dates = set()
-    for df in df_list:
-        unique_dates.update(df['date'].unique())
-    
+    id_columns = {column: _lookup_ids(df[column], maps[dim_name]) for column, dim_name in spec.dimensions.items()}
+    unmapped = {column: int((ids == 0).sum()) for column, ids in id_columns.items()}
+
+    mask = np.logical_and.reduce([ids != 0 for ids in id_columns.values()])
+    fact = pd.DataFrame({DIMENSIONS[spec.dimensions[column]].id_column: ids[mask] for column, ids in id_columns.items()})
+    fact[PARTITION_COLUMN] = df['date'].dt.year.to_numpy()[mask]
+    fact['value'] = df['value'].to_numpy()[mask]
+    for column, const in spec.constants.items():
+        fact[column] = const
+    return fact, unmapped
+
+def frame_to_rows(fact):
+    """
+    Converts a fact frame to driver-ready tuples of plain Python values, column-wise.
+    """
+    return list(zip(*(fact[column].tolist() for column in fact.columns)))
+
+def diff_against_existing(conn, fact_table, key_columns, fact):
+    """
+    Keeps only the rows of `fact` that are new or whose value differs from what
+    is stored (compared at the DECIMAL scale of the value column).
+    """
+    if fact.empty:
+        return fact
+    # Only read back the slice of the table this frame can touch
+    lead = key_columns[0]
+    lead_ids = fact[lead].unique().tolist()
     cursor = conn.cursor()
-    count = 0
-    for date_val in unique_dates:
-        # date_val is a Timestamp
-        d = pd.to_datetime(date_val)
-        quarter = (d.month - 1) // 3 + 1
-        
-        try:
-            cursor.execute("""
-                INSERT IGNORE INTO dim_date (full_date, year, month, quarter) 
-                VALUES (%s, %s, %s, %s)
-            """, (d.date(), d.year, d.month, quarter))
-            count += 1
-        except Error as e:
-            print(f"Error inserting date {d}: {e}")
-    conn.commit()
+    cursor.execute(
+        f"SELECT {', '.join(key_columns)}, value FROM {fact_table} "
+        f"WHERE {lead} IN ({', '.join(['%s'] * len(lead_ids))})",
+        lead_ids
+    )
+    existing = pd.DataFrame(cursor.fetchall(), columns=key_columns + ['stored_value'])
     cursor.close()
-    print(f"Processed {count} dates.")
+    if existing.empty:
+        return fact
 
-def load_fact_cpi(conn, df):
-    print("Loading fact_cpi...")
+    existing[key_columns] = existing[key_columns].astype(np.int64)
+    existing['stored_value'] = existing['stored_value'].astype(float)
+    merged = fact.merge(existing, on=key_columns, how='left')
+    changed = merged['stored_value'].isna() | (merged['value'].round(2) != merged['stored_value'].round(2))
+    print(f"Incremental diff: {int(changed.sum())} new or changed rows, {int((~changed).sum())} unchanged.")
+    return merged.loc[changed.to_numpy(), fact.columns]
+
+def insert_rows(conn, table, columns, rows, key_columns=(), batch_size=1000):
+    """
+    Inserts rows with batched executemany (sent as multi-row INSERTs by the driver).
+    Rows whose natural key already exists have their other columns updated.
+    """
     cursor = conn.cursor()
+    query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+    updates = [f"{column} = VALUES({column})" for column in columns if column not in key_columns]
+    if key_columns and updates:
+        query += f" ON DUPLICATE KEY UPDATE {', '.join(updates)}"
     
-    # Pre-fetch dimensions to memory to speed up lookups (or use SQL joins/subqueries)
-    # For bulk loading, it is often faster to map in Python or use LOAD DATA INFILE.
-    # We will use simple row-by-row for simplicity/robustness first, or batch insert.
-    
-    # Let's map IDs first
-    print("Fetching dimension maps...")
-    cursor.execute("SELECT full_date, date_id FROM dim_date")
-    date_map = {str(d): i for d, i in cursor.fetchall()}
-    
-    cursor.execute("SELECT province_name, geo_id FROM dim_geography")
-    geo_map = {n: i for n, i in cursor.fetchall()}
-    
-    cursor.execute("SELECT product_name, product_id FROM dim_product")
-    prod_map = {n: i for n, i in cursor.fetchall()}
-    
-    # Prepare batch
-    data_to_insert = []
-    
-    # Iterate with limit check? No, let's try to batch.
-    # df has: date, geography, product, value
-    # We need to map these to IDs.
-    
-    print("Mapping data to IDs...")
-    # Convert date column to string for mapping
-    temp_df = df.copy()
-    temp_df['date_str'] = temp_df['date'].dt.date.astype(str)
-    
-    for _, row in temp_df.iterrows():
-        d_id = date_map.get(row['date_str'])
-        g_id = geo_map.get(row['geography'])
-        p_id = prod_map.get(row['product'])
-        
-        if d_id and g_id and p_id:
-            data_to_insert.append((d_id, g_id, p_id, row['value']))
-            
-    # Bulk Insert
-    print(f"Inserting {len(data_to_insert)} rows into fact_cpi...")
-    query = "INSERT INTO fact_cpi (date_id, geo_id, product_id, value) VALUES (%s, %s, %s, %s)"
-    
-    batch_size = 1000
-    for i in range(0, len(data_to_insert), batch_size):
-        batch = data_to_insert[i:i + batch_size]
+    for i in range(0, len(rows), batch_size):
+        batch = rows[i:i + batch_size]
         cursor.executemany(query, batch)
         if i % 10000 == 0:
             print(f"Inserted {i} rows...")
@@ -167,78 +135,338 @@ def load_fact_cpi(conn, df):
             
     conn.commit()
     cursor.close()
-    print("Done loading fact_cpi.")
 
-def load_fact_retail(conn, df):
-    print("Loading fact_retail_sales...")
-    cursor = conn.cursor()
-    
-    print("Fetching dimension maps...")
-    cursor.execute("SELECT full_date, date_id FROM dim_date")
-    date_map = {str(d): i for d, i in cursor.fetchall()}
-    
-    cursor.execute("SELECT province_name, geo_id FROM dim_geography")
-    geo_map = {n: i for n, i in cursor.fetchall()}
-    
-    cursor.execute("SELECT industry_name, industry_id FROM dim_industry")
-    ind_map = {n: i for n, i in cursor.fetchall()}
+def bulk_load_rows(conn, table, columns, rows, key_columns=()):
+    """
+    Writes rows to a temporary TSV and loads it with LOAD DATA LOCAL INFILE,
+    replacing rows whose natural key already exists.
+    Falls back to insert_rows if local_infile is disabled on the server or client.
+    """
+    tsv = tempfile.NamedTemporaryFile("w", suffix=".tsv", newline="", delete=False)
+    try:
+        with tsv:
+            csv.writer(tsv, delimiter="\t", lineterminator="\n").writerows(rows)
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                f"LOAD DATA LOCAL INFILE %s REPLACE INTO TABLE {table} "
+                "FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' "
+                f"({', '.join(columns)})",
+                (tsv.name,)
+            )
+            conn.commit()
+        except Error as e:
+            if e.errno not in LOCAL_INFILE_DISABLED_ERRORS:
+                raise
+            print(f"LOAD DATA LOCAL INFILE unavailable ({e}), falling back to multi-row INSERT...")
+            conn.rollback()
+            insert_rows(conn, table, columns, rows, key_columns, batch_size=5000)
+        finally:
+            cursor.close()
+    finally:
+        os.remove(tsv.name)
+
+# ---- Parallel partition loading ----
+
+_worker_state = threading.local()
+_worker_connections = []
+_worker_connections_lock = threading.Lock()
+_load_executor = None
+_load_executor_workers = None
+_load_executor_lock = threading.Lock()
+
+def _get_load_executor(workers):
+    """
+    One executor is shared by every fact table, so the number of open
+    load connections (one per worker thread) never exceeds `workers`.
+    A call with a different `workers` replaces it with one of that size,
+    once the partitions already submitted have finished.
+    """
+    global _load_executor, _load_executor_workers
+    with _load_executor_lock:
+        if _load_executor is not None and _load_executor_workers != workers:
+            _load_executor.shutdown(wait=True)
+            _load_executor = None
+        if _load_executor is None:
+            _load_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fact-load")
+            _load_executor_workers = workers
+        return _load_executor
+
+def _worker_connection():
+    conn = getattr(_worker_state, "conn", None)
+    if conn is None or not conn.is_connected():
+        conn = get_db_connection(bulk=True)
+        if conn is None:
+            raise RuntimeError("Could not open a database connection for a load worker")
+        _worker_state.conn = conn
+        with _worker_connections_lock:
+            _worker_connections.append(conn)
+    return conn
+
+def shutdown_load_workers():
+    """
+    Stops the partition executor and closes its connections.
+    """
+    global _load_executor, _load_executor_workers
+    with _load_executor_lock:
+        if _load_executor is not None:
+            _load_executor.shutdown(wait=True)
+            _load_executor = None
+            _load_executor_workers = None
+    with _worker_connections_lock:
+        for conn in _worker_connections:
+            try:
+                conn.close()
+            except Error:
+                pass
+        _worker_connections.clear()
+
+def partition_by_date(fact, partitions):
+    """
+    Splits a fact frame into contiguous date_id ranges of roughly equal row count.
+    date_id leads the natural key, so partitions touch disjoint index ranges
+    and concurrent writers rarely contend for the same locks.
+    """
+    counts = fact.groupby('date_id').size().sort_index()
+    bucket = ((counts.cumsum() - 1) * partitions // max(len(fact), 1)).astype(int)
+    labels = fact['date_id'].map(bucket)
+    return [part for _, part in fact.groupby(labels.to_numpy(), sort=True)]
+
+def _load_partition(table, columns, key_columns, part, mode):
+    """
+    Loads one partition on the worker's own connection and commits it.
+    """
+    for attempt in range(PARTITION_RETRIES + 1):
+        conn = _worker_connection()
+        try:
+            rows = frame_to_rows(part)
+            if mode == 'insert':
+                insert_rows(conn, table, columns, rows, key_columns)
+            else:
+                bulk_load_rows(conn, table, columns, rows, key_columns)
+            return len(rows)
+        except Error as e:
+            conn.rollback()
+            if e.errno not in RETRYABLE_LOAD_ERRORS or attempt == PARTITION_RETRIES:
+                raise
+            print(f"Partition of {table} hit {e}, retrying...")
+            time.sleep(0.5 * 2 ** attempt)
+
+def load_partitions(table, columns, key_columns, fact, mode, workers):
+    """
+    Loads a fact frame as date-range partitions on the shared worker pool.
+    At most `workers` partitions are in flight at once and each commits on its own.
+    """
+    parts = partition_by_date(fact, workers * 2)
+    print(f"Loading {len(fact)} rows into {table} as {len(parts)} partitions on {workers} connections...")
+    executor = _get_load_executor(workers)
+    futures = [executor.submit(_load_partition, table, columns, key_columns, part, mode) for part in parts]
+    return sum(future.result() for future in futures)
+
+def load_fact(conn, frames, mode=None, workers=None, refresh=True):
+    """
+    Maps normalized frames to dimension ids and loads them into their fact table.
+    `frames` is a list of (spec, DataFrame) pairs that all target the same fact table;
+    loading them together means overlapping natural keys resolve to the last spec.
+
+    Modes: 'insert' (batched upserts), 'bulk' (LOAD DATA LOCAL INFILE),
+    'incremental' (diff against stored rows, then bulk-load only new or changed ones)
+    and 'swap' (bulk-load a shadow table with indexes deferred, then atomically
+    rename it over the live table, so readers never see a half-loaded table).
+    Every mode is keyed on the natural key, so re-running a load never duplicates rows.
+
+    With workers > 1 the rows are split into date-range partitions that load
+    concurrently on separate connections.
+
+    With refresh=False the summary tables are left alone and the returned
+    stats carry the refresh_aggregates arguments under 'refresh' instead.
+    """
+    mode = mode or LOAD_MODE
+    workers = workers or LOAD_WORKERS
+    if mode not in LOAD_MODES:
+        raise ValueError(f"Unknown load mode {mode!r}, expected one of {LOAD_MODES}")
+    spec = frames[0][0]
+    fact_table, columns = spec.fact_table, spec.fact_columns
+    key_columns = fact_key_columns(fact_table)
+    if mode == 'swap':
+        # The swapped-in table replaces everything, so every spec feeding it has to be loaded
+        missing_specs = {x.name for x in specs_for_fact_table(fact_table)} - {s.name for s, _ in frames}
+        if missing_specs:
+            raise ValueError(f"swap mode would drop {fact_table} rows from {sorted(missing_specs)}")
+    print(f"Loading {fact_table} ({', '.join(s.description for s, _ in frames)})...")
     
-    data_to_insert = []
-    temp_df = df.copy()
-    temp_df['date_str'] = temp_df['date'].dt.date.astype(str)
+    # Dimension maps are shared across fact loads and only refreshed for new members
+    dimensions = get_dimension_manager()
+    dim_names = {dim_name for s, _ in frames for dim_name in s.dimensions.values()}
+    maps = {dim_name: dimensions.id_map(conn, dim_name) for dim_name in dim_names}
     
     print("Mapping data to IDs...")
-    for _, row in temp_df.iterrows():
-        d_id = date_map.get(row['date_str'])
-        g_id = geo_map.get(row['geography'])
-        i_id = ind_map.get(row['industry'])
-        
-        if d_id and g_id and i_id:
-            # We assume 'Dollars' for unit for now based on CSV review
-            data_to_insert.append((d_id, g_id, i_id, row['value'], 'Dollars'))
+    start = time.perf_counter()
+    mapped, skipped, unmapped = [], 0, {}
+    for s, df in frames:
+        fact, missing = map_fact_frame(s, df, maps)
+        mapped.append(fact)
+        skipped += len(df) - len(fact)
+        for column, n in missing.items():
+            unmapped[column] = unmapped.get(column, 0) + n
+    fact = pd.concat(mapped, ignore_index=True)
+    print(f"Mapped {len(fact)} rows in {time.perf_counter() - start:.2f}s")
+    if skipped:
+        details = ', '.join(f"{column}={n}" for column, n in unmapped.items() if n)
+        print(f"WARNING: skipped {skipped} rows with unmapped dimension keys ({details})")
+
+    duplicates = int(fact.duplicated(subset=key_columns, keep='last').sum())
+    if duplicates:
+        print(f"Dropping {duplicates} rows that repeat a natural key (last one wins).")
+        fact = fact.drop_duplicates(subset=key_columns, keep='last')
+
+    if mode == 'incremental':
+        fact = diff_against_existing(conn, fact_table, key_columns, fact)
             
-    query = "INSERT INTO fact_retail_sales (date_id, geo_id, industry_id, value, unit) VALUES (%s, %s, %s, %s, %s)"
-    
-    print(f"Inserting {len(data_to_insert)} rows into fact_retail_sales...")
-    batch_size = 1000
-    for i in range(0, len(data_to_insert), batch_size):
-        batch = data_to_insert[i:i + batch_size]
-        cursor.executemany(query, batch)
-        
-    conn.commit()
-    cursor.close()
-    print("Done loading fact_retail_sales.")
+    print(f"Inserting {len(fact)} rows into {fact_table} ({mode} mode)...")
+    start = time.perf_counter()
+    target = fact_table
+    if mode == 'swap' and not len(fact):
+        print(f"No rows for {fact_table}; keeping the live table instead of swapping in an empty one.")
+        mode = 'bulk'
+    if mode == 'swap':
+        target, deferred = prepare_shadow_table(conn, fact_table)
+    if workers > 1 and len(fact):
+        load_partitions(target, columns, key_columns, fact, 'insert' if mode == 'insert' else 'bulk', workers)
+    elif mode == 'insert':
+        insert_rows(conn, target, columns, frame_to_rows(fact), key_columns)
+    elif len(fact):
+        bulk_load_rows(conn, target, columns, frame_to_rows(fact), key_columns)
+    if mode == 'swap':
+        finish_shadow_table(conn, fact_table, target, deferred)
+    elapsed = time.perf_counter() - start
+    rate = len(fact) / elapsed if elapsed > 0 else 0.0
+    print(f"Done loading {fact_table}: {len(fact)} rows in {elapsed:.1f}s ({rate:,.0f} rows/sec).")
+
+    # Summary tables only need the months this load wrote; a swap replaced everything
+    pending = None
+    if mode == 'swap':
+        pending = (fact_table, None)
+    elif len(fact):
+        pending = (fact_table, fact['date_id'].unique().tolist())
+    stats = {'rows': len(fact), 'skipped': skipped, 'unmapped': unmapped, 'seconds': elapsed}
+    if not refresh:
+        stats['refresh'] = pending
+    elif pending:
+        refresh_aggregates(conn, *pending)
+    return stats
+
+def _load_fact_on_own_connection(frames, mode, workers):
+    conn = get_db_connection(bulk=True)
+    if conn is None:
+        raise RuntimeError(f"Could not open a database connection to load {frames[0][0].fact_table}")
+    try:
+        return load_fact(conn, frames, mode=mode, workers=workers, refresh=False)
+    finally:
+        conn.close()
+
+def load_facts(conn, frames, mode=None, workers=None):
+    """
+    Loads every fact table. With workers > 1 independent fact tables
+    (CPI and retail) load at the same time, each on its own connection.
+    Their summary tables are refreshed once every fact table has finished:
+    agg_real_sales reads both, and refreshing it while the other table's
+    partitions are still loading can deadlock against them.
+    """
+    workers = workers or LOAD_WORKERS
+    groups = list(group_by_fact_table(frames).values())
+    if workers <= 1 or len(groups) == 1:
+        return [load_fact(conn, fact_frames, mode=mode, workers=workers) for fact_frames in groups]
 
+    with ThreadPoolExecutor(max_workers=len(groups), thread_name_prefix="fact-table") as tables:
+        futures = [tables.submit(_load_fact_on_own_connection, fact_frames, mode, workers) for fact_frames in groups]
+        results, error = [], None
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                error = error or e
+    # A table that loaded still gets its summaries even if the other one failed
+    for stats in results:
+        pending = stats.pop('refresh')
+        if pending:
+            refresh_aggregates(conn, *pending)
+    if error:
+        raise error
+    return results
 
-def run_etl():
-    conn = get_db_connection()
+def group_by_fact_table(frames):
+    """
+    Groups (spec, DataFrame) pairs by target fact table, keeping registry order.
+    """
+    groups = {}
+    for spec, df in frames:
+        groups.setdefault(spec.fact_table, []).append((spec, df))
+    return groups
+
+def load_in_chunks(conn, specs, chunksize, load_mode=None, workers=None):
+    """
+    Streams each table through dimension and fact loading one chunk at a time,
+    so peak memory is bounded by chunksize instead of the table size.
+    Note that chunks of different specs can't be deduplicated against each other,
+    so keys shared by two specs are rewritten by each of them.
+    Returns the number of fact rows written.
+    """
+    rows = 0
+    for spec in specs:
+        for chunk in iter_transform_table(spec, chunksize=chunksize):
+            load_dimensions(conn, [(spec, chunk)])
+            rows += load_fact(conn, [(spec, chunk)], mode=load_mode, workers=workers)['rows']
+    return rows
+
+def run_etl(chunksize=None, specs=None, load_mode=None, workers=None):
+    """
+    Transforms the extracted tables and loads them into the warehouse.
+    Every registered TableSpec is processed unless `specs` narrows it down.
+    With chunksize set, tables are streamed through in chunks of that many rows.
+    load_mode ('insert', 'bulk', 'incremental' or 'swap') overrides ETL_LOAD_MODE and
+    workers overrides ETL_LOAD_WORKERS for this run.
+    """
+    specs = list(specs or TABLE_SPECS.values())
+    if chunksize and (load_mode or LOAD_MODE) == 'swap':
+        # Each chunk would swap in a table holding only that chunk
+        raise ValueError("swap mode needs whole tables; run it without chunksize")
+    conn = get_db_connection(bulk=True)
     if not conn:
         return
         
     try:
-        # Get data
-        cpi_df = transform_cpi()
-        retail_ind_df = transform_retail_industry()
-        retail_prov_df = transform_retail_province()
-        
-        # Load Dimensions
-        load_dim_geography(conn, [cpi_df, retail_ind_df, retail_prov_df])
-        load_dim_date(conn, [cpi_df, retail_ind_df, retail_prov_df])
-        load_dim_product(conn, cpi_df)
-        load_dim_industry(conn, [retail_ind_df, retail_prov_df])
-        
-        # Load Facts
-        # Note: This might take a while for large CPI files
-        load_fact_cpi(conn, cpi_df)
-        load_fact_retail(conn, retail_ind_df) # Industry specific
-        load_fact_retail(conn, retail_prov_df) # Province specific aggregates
+        # Older databases predate the natural keys that make loads idempotent
+        ensure_natural_keys(conn)
+        apply_migrations(conn)
+
+        if chunksize:
+            rows = load_in_chunks(conn, specs, chunksize, load_mode, workers)
+        else:
+            # Get data
+            frames = [(spec, transform_table(spec)) for spec in specs]
+            
+            # Load Dimensions
+            load_dimensions(conn, frames)
+            
+            # Load Facts
+            # Note: This might take a while for large CPI files
+            rows = sum(stats['rows'] for stats in load_facts(conn, frames, mode=load_mode, workers=workers))
+
+        # Tell the dashboard what's loaded now; a run that wrote nothing
+        # keeps the current version, and with it every dashboard cache
+        if rows or current_load_version(conn) is None:
+            publish_manifest(conn)
+        try_export_warehouse(conn)
         
     except Exception as e:
         print(f"ETL Failed: {e}")
         import traceback
         traceback.print_exc()
     finally:
+        shutdown_load_workers()
         conn.close()
 
 if __name__ == "__main__":
-    run_etl()
+    run_etl(chunksize=int(os.getenv("ETL_CHUNK_ROWS", 0)) or None)
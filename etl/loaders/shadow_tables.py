@@ -0,0 +1,85 @@
+SHADOW_SUFFIX = "_next"
+RETIRED_SUFFIX = "_old"
+
+def shadow_name(table):
+    return f"{table}{SHADOW_SUFFIX}"
+
+def _secondary_indexes(cursor, table):
+    """
+    Returns [(index_name, unique, [columns])] for every non-primary index on a table.
+    """
+    cursor.execute("""
+        SELECT index_name, non_unique, column_name FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name <> 'PRIMARY'
+        ORDER BY index_name, seq_in_index
+    """, (table,))
+    indexes = {}
+    for name, non_unique, column in cursor.fetchall():
+        indexes.setdefault(name, (not non_unique, []))[1].append(column)
+    return [(name, unique, columns) for name, (unique, columns) in indexes.items()]
+
+def _foreign_keys(cursor, table):
+    """
+    Returns [([columns], referenced_table, [referenced_columns])] for a table's foreign keys.
+    """
+    cursor.execute("""
+        SELECT constraint_name, column_name, referenced_table_name, referenced_column_name
+        FROM information_schema.key_column_usage
+        WHERE table_schema = DATABASE() AND table_name = %s AND referenced_table_name IS NOT NULL
+        ORDER BY constraint_name, ordinal_position
+    """, (table,))
+    keys = {}
+    for name, column, ref_table, ref_column in cursor.fetchall():
+        columns, _, ref_columns = keys.setdefault(name, ([], ref_table, []))
+        columns.append(column)
+        ref_columns.append(ref_column)
+    return list(keys.values())
+
+def prepare_shadow_table(conn, table):
+    """
+    Creates an empty {table}_next with the live table's columns and primary key
+    but none of its secondary indexes, so bulk loads only maintain the clustered index.
+    Any shadow left behind by a failed run is dropped first.
+    Returns (shadow table name, deferred definition) for finish_shadow_table.
+    """
+    shadow = shadow_name(table)
+    cursor = conn.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS {shadow}")
+    # CREATE TABLE ... LIKE copies indexes but not foreign keys
+    cursor.execute(f"CREATE TABLE {shadow} LIKE {table}")
+    indexes = _secondary_indexes(cursor, shadow)
+    if indexes:
+        cursor.execute(f"ALTER TABLE {shadow} " + ", ".join(f"DROP INDEX {name}" for name, _, _ in indexes))
+    deferred = {'indexes': indexes, 'foreign_keys': _foreign_keys(cursor, table)}
+    cursor.close()
+    print(f"Prepared {shadow} (deferred {len(indexes)} indexes, {len(deferred['foreign_keys'])} foreign keys).")
+    return shadow, deferred
+
+def finish_shadow_table(conn, table, shadow, deferred):
+    """
+    Builds the deferred indexes and foreign keys on the loaded shadow in a
+    single ALTER, then swaps it in with one atomic RENAME TABLE.
+    Readers see the old table right up to the rename and the new one after it.
+    """
+    clauses = []
+    for name, unique, columns in deferred['indexes']:
+        clauses.append(f"ADD {'UNIQUE ' if unique else ''}KEY {name} ({', '.join(columns)})")
+    for columns, ref_table, ref_columns in deferred['foreign_keys']:
+        clauses.append(f"ADD FOREIGN KEY ({', '.join(columns)}) REFERENCES {ref_table} ({', '.join(ref_columns)})")
+
+    cursor = conn.cursor()
+    if clauses:
+        print(f"Building {len(clauses)} deferred indexes/keys on {shadow}...")
+        # Every id came from the dimension maps, so re-validating each row is wasted work
+        cursor.execute("SET SESSION foreign_key_checks = 0")
+        try:
+            cursor.execute(f"ALTER TABLE {shadow} " + ", ".join(clauses))
+        finally:
+            cursor.execute("SET SESSION foreign_key_checks = 1")
+
+    retired = f"{table}{RETIRED_SUFFIX}"
+    cursor.execute(f"DROP TABLE IF EXISTS {retired}")
+    cursor.execute(f"RENAME TABLE {table} TO {retired}, {shadow} TO {table}")
+    cursor.execute(f"DROP TABLE {retired}")
+    cursor.close()
+    print(f"Swapped {shadow} in as {table}.")
@@ -0,0 +1,84 @@
+import os
+import sys
+import json
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from etl.db import get_db_connection
+from etl.categories import categorize_industry
+from etl.table_specs import fact_tables
+
+MANIFEST_FORMAT = 1
+
+def build_manifest(conn):
+    """
+    Collects what the dashboard needs at startup: geographies, industries
+    with their categories, and the dates loaded into each fact table.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT province_name FROM dim_geography ORDER BY province_name")
+    geographies = [row[0] for row in cursor.fetchall()]
+    cursor.execute("SELECT industry_name FROM dim_industry ORDER BY industry_name")
+    industries = [{'name': row[0], 'category': categorize_industry(row[0])} for row in cursor.fetchall()]
+
+    dates = {}
+    for table in fact_tables():
+        # DISTINCT date_id reads only the natural key index, which leads with date_id
+        cursor.execute(f"""
+            SELECT d.full_date
+            FROM (SELECT DISTINCT date_id FROM {table}) f
+            JOIN dim_date d ON f.date_id = d.date_id
+            ORDER BY d.full_date
+        """)
+        loaded = [row[0].isoformat() for row in cursor.fetchall()]
+        dates[table] = {
+            'min_date': loaded[0] if loaded else None,
+            'max_date': loaded[-1] if loaded else None,
+            'dates': loaded,
+        }
+    cursor.close()
+
+    return {
+        'format': MANIFEST_FORMAT,
+        'geographies': geographies,
+        'industries': industries,
+        'fact_tables': dates,
+    }
+
+def current_load_version(conn):
+    """
+    Returns the newest published load version, or None if nothing has been published.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT MAX(load_version) FROM etl_load_versions")
+    version = cursor.fetchone()[0]
+    cursor.close()
+    return version
+
+def publish_manifest(conn):
+    """
+    Stores a fresh manifest as a new load version and returns the version.
+    Call it after a load that changed the warehouse; the version is what
+    readers use to tell that their cached metadata is stale.
+    """
+    start = time.perf_counter()
+    # End any open transaction: its snapshot predates the facts committed
+    # by the other load connections since
+    conn.commit()
+    manifest = build_manifest(conn)
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO etl_load_versions (manifest) VALUES (%s)", (json.dumps(manifest),))
+    version = cursor.lastrowid
+    conn.commit()
+    cursor.close()
+    print(f"Published metadata manifest as load version {version} ({time.perf_counter() - start:.2f}s).")
+    return version
+
+if __name__ == "__main__":
+    conn = get_db_connection()
+    if conn is None:
+        sys.exit(1)
+    try:
+        publish_manifest(conn)
+    finally:
+        conn.close()
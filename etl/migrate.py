@@ -0,0 +1,152 @@
+import os
+import re
+import sys
+import hashlib
+import importlib.util
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from etl.db import get_db_connection
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "sql", "migrations")
+
+# NNNN_description.sql, or NNNN_description.py defining upgrade(conn)
+MIGRATION_FILE = re.compile(r"^(\d+)_([\w-]+)\.(sql|py)$")
+
+MIGRATIONS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INT PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        checksum CHAR(64) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# Seconds to wait for another process that is migrating the same database
+LOCK_TIMEOUT = 300
+
+def split_sql(text):
+    """
+    Splits a SQL script into statements on top-level semicolons.
+    Semicolons inside quotes, backticks and comments don't end a statement,
+    and comments are dropped.
+    """
+    statements, current = [], []
+    i, n = 0, len(text)
+    quote = None
+    while i < n:
+        ch = text[i]
+        if quote:
+            current.append(ch)
+            if ch == "\\" and quote != "`" and i + 1 < n:
+                current.append(text[i + 1])
+                i += 1
+            elif ch == quote:
+                quote = None
+        elif ch in ("'", '"', "`"):
+            quote = ch
+            current.append(ch)
+        elif text.startswith("--", i) or ch == "#":
+            end = text.find("\n", i)
+            i = n if end == -1 else end
+            continue
+        elif text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+            current.append(" ")
+            continue
+        elif ch == ";":
+            statement = "".join(current).strip()
+            if statement:
+                statements.append(statement)
+            current = []
+        else:
+            current.append(ch)
+        i += 1
+    statement = "".join(current).strip()
+    if statement:
+        statements.append(statement)
+    return statements
+
+def discover_migrations(migrations_dir=MIGRATIONS_DIR):
+    """
+    Returns [(version, name, path)] for every migration file, ordered by version.
+    """
+    migrations = {}
+    for filename in sorted(os.listdir(migrations_dir)):
+        match = MIGRATION_FILE.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in migrations:
+            raise ValueError(f"Duplicate migration version {version}: {migrations[version][1]} and {filename}")
+        migrations[version] = (version, filename, os.path.join(migrations_dir, filename))
+    return [migrations[version] for version in sorted(migrations)]
+
+def _checksum(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def _run_migration(conn, path):
+    if path.endswith(".py"):
+        module_spec = importlib.util.spec_from_file_location(f"migration_{os.path.basename(path)[:-3]}", path)
+        module = importlib.util.module_from_spec(module_spec)
+        module_spec.loader.exec_module(module)
+        module.upgrade(conn)
+        return
+
+    with open(path, "r") as f:
+        statements = split_sql(f.read())
+    cursor = conn.cursor()
+    for statement in statements:
+        cursor.execute(statement)
+    cursor.close()
+
+def apply_migrations(conn, migrations_dir=MIGRATIONS_DIR):
+    """
+    Applies every migration that isn't recorded in schema_migrations yet, in
+    version order, recording each one as it completes. MySQL commits DDL
+    implicitly, so a failed migration stops the run and is retried next time.
+    Returns the versions applied.
+    """
+    cursor = conn.cursor()
+    cursor.execute(MIGRATIONS_TABLE_SQL)
+    cursor.execute("SELECT GET_LOCK('schema_migrations', %s)", (LOCK_TIMEOUT,))
+    if cursor.fetchone()[0] != 1:
+        cursor.close()
+        raise RuntimeError("Timed out waiting for another process to finish migrating")
+
+    applied = []
+    try:
+        cursor.execute("SELECT version, checksum FROM schema_migrations")
+        done = dict(cursor.fetchall())
+        for version, name, path in discover_migrations(migrations_dir):
+            checksum = _checksum(path)
+            if version in done:
+                if done[version] != checksum:
+                    print(f"WARNING: migration {name} changed after it was applied; not re-running it.")
+                continue
+            print(f"Applying migration {name}...")
+            _run_migration(conn, path)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+                (version, name, checksum)
+            )
+            conn.commit()
+            applied.append(version)
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK('schema_migrations')")
+        cursor.fetchall()
+        cursor.close()
+
+    if applied:
+        print(f"Applied {len(applied)} migrations.")
+    return applied
+
+if __name__ == "__main__":
+    conn = get_db_connection()
+    if conn is None:
+        sys.exit(1)
+    try:
+        apply_migrations(conn)
+    finally:
+        conn.close()
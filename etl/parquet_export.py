@@ -0,0 +1,162 @@
+import os
+import sys
+import time
+import shutil
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from etl.db import get_db_connection
+from etl.metadata import current_load_version
+from etl.table_specs import DIMENSIONS, fact_tables
+from etl.loaders.aggregates import AGGREGATES
+
+# pyarrow ships with streamlit; without it the export is skipped
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Where each load version is exported as Parquet for the dashboard's parquet
+# backend (streamlit_app/warehouse.py); unset disables the export
+EXPORT_DIR = os.getenv("PARQUET_WAREHOUSE_DIR", "")
+# Older exports are kept so a dashboard still reading one isn't cut off mid-query
+KEEP_VERSIONS = int(os.getenv("PARQUET_KEEP_VERSIONS", 2))
+
+# Names the version the dashboard should read; replaced atomically after each export
+CURRENT_FILE = "CURRENT"
+
+FETCH_ROWS = 100_000
+
+def export_tables():
+    """
+    Everything the dashboard queries: dimensions, facts, summaries and the manifest.
+    """
+    dimensions = [spec.table for spec in DIMENSIONS.values()]
+    return dimensions + fact_tables() + list(AGGREGATES) + ['etl_load_versions']
+
+def version_dir(export_dir, version):
+    return os.path.join(export_dir, f"v{version}")
+
+def read_current_version(export_dir):
+    """
+    The version named by CURRENT, or None if nothing has been exported.
+    """
+    try:
+        with open(os.path.join(export_dir, CURRENT_FILE), "r") as f:
+            return int(f.read().strip())
+    except (FileNotFoundError, ValueError):
+        return None
+
+def _arrow_type(data_type, precision, scale):
+    if data_type in ('tinyint', 'smallint', 'mediumint', 'int', 'bigint'):
+        return pa.int64()
+    if data_type == 'decimal':
+        return pa.decimal128(int(precision), int(scale))
+    if data_type in ('float', 'double'):
+        return pa.float64()
+    if data_type == 'date':
+        return pa.date32()
+    if data_type in ('datetime', 'timestamp'):
+        return pa.timestamp('us')
+    return pa.string()
+
+def _table_schema(cursor, table):
+    """
+    Arrow schema matching the MySQL column types, so DECIMALs stay exact and
+    every batch of a table is written with the same types.
+    """
+    cursor.execute("""
+        SELECT column_name, data_type, numeric_precision, numeric_scale
+        FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s
+        ORDER BY ordinal_position
+    """, (table,))
+    return pa.schema([(name, _arrow_type(data_type, precision, scale)) for name, data_type, precision, scale in cursor.fetchall()])
+
+def _export_table(conn, table, path, where="", params=()):
+    cursor = conn.cursor()
+    schema = _table_schema(cursor, table)
+    cursor.execute(f"SELECT {', '.join(schema.names)} FROM {table} {where}", params)
+    rows = 0
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        while True:
+            batch = cursor.fetchmany(FETCH_ROWS)
+            if not batch:
+                break
+            columns = [pa.array(values, type=field.type) for values, field in zip(zip(*batch), schema)]
+            writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+            rows += len(batch)
+    cursor.close()
+    return rows
+
+def _prune(export_dir, keep):
+    versions = sorted(
+        int(name[1:]) for name in os.listdir(export_dir)
+        if name.startswith("v") and name[1:].isdigit()
+    )
+    for version in versions[:-keep]:
+        shutil.rmtree(version_dir(export_dir, version), ignore_errors=True)
+
+def export_warehouse(conn, export_dir=None):
+    """
+    Writes the current load version of every table in export_tables() to
+    <export_dir>/v<version>/<table>.parquet, then points CURRENT at it.
+    Does nothing if the export is disabled, nothing has been published yet,
+    or this version was already exported. Returns the exported version or None.
+    """
+    export_dir = export_dir or EXPORT_DIR
+    if not export_dir:
+        return None
+    if pa is None:
+        print("pyarrow is not installed; skipping the Parquet export.")
+        return None
+    version = current_load_version(conn)
+    if version is None or read_current_version(export_dir) == version:
+        return None
+
+    start = time.perf_counter()
+    target = version_dir(export_dir, version)
+    partial = target + ".part"
+    shutil.rmtree(partial, ignore_errors=True)
+    os.makedirs(partial)
+    rows = 0
+    try:
+        for table in export_tables():
+            path = os.path.join(partial, f"{table}.parquet")
+            if table == 'etl_load_versions':
+                rows += _export_table(conn, table, path, "WHERE load_version = %s", (version,))
+            else:
+                rows += _export_table(conn, table, path)
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(partial, target)
+    except Exception:
+        shutil.rmtree(partial, ignore_errors=True)
+        raise
+
+    current = os.path.join(export_dir, CURRENT_FILE)
+    with open(current + ".tmp", "w") as f:
+        f.write(str(version))
+    os.replace(current + ".tmp", current)
+    _prune(export_dir, max(KEEP_VERSIONS, 1))
+    print(f"Exported load version {version} to {target} ({rows} rows, {time.perf_counter() - start:.1f}s).")
+    return version
+
+def try_export_warehouse(conn, export_dir=None):
+    """
+    export_warehouse for the end of a load: the export is optional, so a
+    failure is reported as a warning and never fails the load that preceded it.
+    """
+    try:
+        return export_warehouse(conn, export_dir)
+    except Exception as e:
+        print(f"WARNING: Parquet export failed, the MySQL load is unaffected: {e}")
+        return None
+
+if __name__ == "__main__":
+    conn = get_db_connection()
+    if conn is None:
+        sys.exit(1)
+    try:
+        export_warehouse(conn)
+    finally:
+        conn.close()
@@ -0,0 +1,205 @@
+import os
+import sys
+import json
+import hashlib
+import traceback
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from etl.db import get_db_connection
+from etl.init_mysql import ensure_natural_keys
+from etl.migrate import apply_migrations
+from etl.metadata import current_load_version, publish_manifest
+from etl.parquet_export import try_export_warehouse
+from etl.staging import parquet_enabled
+from etl.table_specs import TABLE_SPECS, fact_tables, specs_for_fact_table
+from etl.extractors.main_extractor import DATA_DIR, fetch_tables, load_manifest
+from etl.transformers.main_transformer import transform_table
+from etl.loaders.main_loader import load_dimensions, load_fact, shutdown_load_workers
+
+# Transformed frames are kept here so a failed load can resume without re-transforming
+TRANSFORMED_DIR = os.path.join(DATA_DIR, "transformed")
+
+# ---- Checkpoints ----
+
+def load_checkpoints(conn):
+    """
+    Returns {(stage, scope): (input_hash, status)} for every recorded stage.
+    The checkpoints live next to the data they describe, so wiping the
+    warehouse also forgets what was loaded into it. The table comes from
+    sql/migrations, so apply_migrations must have run first.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT stage, scope, input_hash, status FROM etl_checkpoints")
+    checkpoints = {(stage, scope): (input_hash, status) for stage, scope, input_hash, status in cursor.fetchall()}
+    cursor.close()
+    return checkpoints
+
+def record_checkpoint(conn, checkpoints, stage, scope, input_hash, status, detail=None):
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO etl_checkpoints (stage, scope, input_hash, status, detail)
+        VALUES (%s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE input_hash = VALUES(input_hash), status = VALUES(status), detail = VALUES(detail)
+    """, (stage, scope, input_hash, status, detail))
+    conn.commit()
+    cursor.close()
+    checkpoints[(stage, scope)] = (input_hash, status)
+
+def is_done(checkpoints, stage, scope, input_hash):
+    return checkpoints.get((stage, scope)) == (input_hash, 'done')
+
+# ---- Input hashes ----
+
+def _sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def source_hash(spec, manifest):
+    """
+    Content hash of a spec's extracted CSV. The extractor records the SHA-256
+    of every download, so the file itself is only hashed if it was put in place by hand.
+    """
+    entry = manifest.get(spec.table_id, {})
+    if entry.get("output_filename") == spec.filename and entry.get("sha256"):
+        return entry["sha256"]
+    path = os.path.join(DATA_DIR, spec.filename)
+    if not os.path.exists(path):
+        return None
+    return _sha256_file(path)
+
+def spec_hash(spec, source):
+    """
+    Input hash of a spec's transform: its source content hash plus its definition,
+    so editing a filter or column mapping invalidates the checkpoint too.
+    """
+    return hashlib.sha256(json.dumps([source, repr(spec)]).encode()).hexdigest()
+
+def group_hash(spec_hashes):
+    return hashlib.sha256(json.dumps(sorted(spec_hashes)).encode()).hexdigest()
+
+# ---- Stages ----
+
+def _transformed_path(spec):
+    return os.path.join(TRANSFORMED_DIR, f"{spec.name}.parquet")
+
+def run_transform(conn, checkpoints, spec, input_hash):
+    """
+    Returns the transformed frame for a spec, reusing the saved copy when
+    its checkpoint matches the current input hash.
+    """
+    path = _transformed_path(spec)
+    if is_done(checkpoints, 'transform', spec.name, input_hash) and os.path.exists(path):
+        print(f"[transform] {spec.name}: inputs unchanged, reusing {path}")
+        return pd.read_parquet(path)
+
+    print(f"[transform] {spec.name}: transforming...")
+    df = transform_table(spec)
+    if parquet_enabled():
+        os.makedirs(TRANSFORMED_DIR, exist_ok=True)
+        df.to_parquet(path + ".part", index=False)
+        os.replace(path + ".part", path)
+    record_checkpoint(conn, checkpoints, 'transform', spec.name, input_hash, 'done', f"{len(df)} rows")
+    return df
+
+def run_fact_table(conn, checkpoints, fact_table, specs, hashes, load_mode=None, workers=None, force=False):
+    """
+    Runs transform -> dimensions -> fact_load for one fact table, skipping the
+    whole table when its last load used exactly these inputs, and each stage
+    that already completed for them.
+    """
+    key = group_hash([hashes[spec.name] for spec in specs])
+    if not force and is_done(checkpoints, 'fact_load', fact_table, key):
+        print(f"[fact_load] {fact_table}: inputs unchanged since last load, skipping.")
+        return 'skipped'
+
+    frames = []
+    for spec in specs:
+        if force:
+            checkpoints.pop(('transform', spec.name), None)
+        frames.append((spec, run_transform(conn, checkpoints, spec, hashes[spec.name])))
+
+    if force or not is_done(checkpoints, 'dimensions', fact_table, key):
+        print(f"[dimensions] {fact_table}: loading members...")
+        load_dimensions(conn, frames)
+        record_checkpoint(conn, checkpoints, 'dimensions', fact_table, key, 'done')
+    else:
+        print(f"[dimensions] {fact_table}: already loaded for these inputs.")
+
+    record_checkpoint(conn, checkpoints, 'fact_load', fact_table, key, 'running')
+    stats = load_fact(conn, frames, mode=load_mode, workers=workers)
+    record_checkpoint(conn, checkpoints, 'fact_load', fact_table, key, 'done', f"{stats['rows']} rows written")
+    return 'loaded'
+
+def run_pipeline(extract=True, load_mode=None, workers=None, force=False):
+    """
+    Runs extract -> transform -> dimensions -> fact_load with checkpoints in
+    the etl_checkpoints table. A rerun resumes at the stage that failed and
+    skips every stage whose input hashes haven't changed, so scheduling it is
+    cheap when StatCan hasn't published anything new.
+    Returns True if every fact table is loaded and up to date.
+    """
+    if extract:
+        print("[extract] fetching tables...")
+        results = fetch_tables()
+        failed = [table_id for table_id, result in results.items() if result is None]
+        if failed:
+            print(f"[extract] failed for {', '.join(failed)}; using the last extracted copy where there is one.")
+
+    conn = get_db_connection(bulk=True)
+    if conn is None:
+        return False
+
+    ok = True
+    loaded = []
+    try:
+        ensure_natural_keys(conn)
+        apply_migrations(conn)
+        checkpoints = load_checkpoints(conn)
+        manifest = load_manifest()
+
+        hashes = {}
+        for spec in TABLE_SPECS.values():
+            source = source_hash(spec, manifest)
+            hashes[spec.name] = spec_hash(spec, source) if source else None
+            if source and not is_done(checkpoints, 'extract', spec.name, source):
+                record_checkpoint(conn, checkpoints, 'extract', spec.name, source, 'done')
+
+        for fact_table in fact_tables():
+            specs = specs_for_fact_table(fact_table)
+            missing = [spec.name for spec in specs if hashes[spec.name] is None]
+            if missing:
+                print(f"[extract] {fact_table}: no extracted data for {', '.join(missing)}, skipping.")
+                ok = False
+                continue
+            try:
+                if run_fact_table(conn, checkpoints, fact_table, specs, hashes, load_mode, workers, force) == 'loaded':
+                    loaded.append(fact_table)
+            except Exception as e:
+                # Leave the checkpoint 'failed' so the next run resumes here
+                ok = False
+                print(f"[fact_load] {fact_table} failed: {e}")
+                traceback.print_exc()
+                key = group_hash([hashes[spec.name] for spec in specs])
+                record_checkpoint(conn, checkpoints, 'fact_load', fact_table, key, 'failed', str(e)[:1000])
+
+        # A new load version tells the dashboard its metadata and cached results are stale
+        if loaded or current_load_version(conn) is None:
+            publish_manifest(conn)
+        # Parquet copy for the dashboard's serverless backend (if PARQUET_WAREHOUSE_DIR is set)
+        try_export_warehouse(conn)
+    finally:
+        shutdown_load_workers()
+        conn.close()
+    return ok
+
+if __name__ == "__main__":
+    # ETL_FORCE=1 ignores checkpoints; ETL_SKIP_EXTRACT=1 works from the files already in data/
+    ok = run_pipeline(
+        extract=os.getenv("ETL_SKIP_EXTRACT", "0") != "1",
+        force=os.getenv("ETL_FORCE", "0") == "1",
+    )
+    sys.exit(0 if ok else 1)
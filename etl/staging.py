@@ -0,0 +1,153 @@
+import os
+import csv
+import time
+import pandas as pd
+
+# pyarrow ships with streamlit, but the CSV path keeps working without it
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# 'parquet' stages a columnar copy of every extracted CSV, 'csv' disables it
+STAGING_FORMAT = os.getenv("STAGING_FORMAT", "parquet")
+
+ROW_GROUP_SIZE = 128 * 1024
+CSV_BLOCK_SIZE = 8 * 1024 * 1024
+
+def parquet_enabled():
+    return pa is not None and STAGING_FORMAT == "parquet"
+
+def staged_path(csv_path):
+    return os.path.splitext(csv_path)[0] + ".parquet"
+
+def is_stage_fresh(csv_path):
+    """
+    True if a Parquet copy exists and is at least as new as its CSV.
+    """
+    parquet_path = staged_path(csv_path)
+    if not os.path.exists(parquet_path):
+        return False
+    if not os.path.exists(csv_path):
+        return True
+    return os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)
+
+def _parse_ref_date(column):
+    """
+    StatCan REF_DATE is 'YYYY-MM' for monthly tables and 'YYYY' for annual ones.
+    Pads it to a full date and converts to date32; leaves the column as-is if it doesn't parse.
+    """
+    length = pc.utf8_length(column)
+    padded = pc.if_else(
+        pc.equal(length, 7),
+        pc.binary_join_element_wise(column, "01", "-"),
+        pc.if_else(pc.equal(length, 4), pc.binary_join_element_wise(column, "01-01", "-"), column),
+    )
+    try:
+        return pc.cast(pc.strptime(padded, format="%Y-%m-%d", unit="s"), pa.date32())
+    except pa.ArrowInvalid:
+        return column
+
+def write_parquet_stage(csv_path):
+    """
+    Streams a StatCan CSV into a Parquet file next to it.
+    String columns (GEO, product, NAICS, ...) are dictionary-encoded,
+    REF_DATE becomes a date and VALUE a float, so transformers can read
+    only the columns and row groups they need.
+    Returns the Parquet path, or None if staging is disabled.
+    """
+    if not parquet_enabled():
+        return None
+
+    start = time.perf_counter()
+    parquet_path = staged_path(csv_path)
+    partial_path = parquet_path + ".part"
+
+    # Read the header first so every other column can be pinned to string;
+    # per-block type inference would otherwise disagree between batches
+    with open(csv_path, "r", newline="", encoding="utf-8-sig") as f:
+        names = next(csv.reader(f))
+    column_types = {name: pa.string() for name in names}
+    if "VALUE" in column_types:
+        column_types["VALUE"] = pa.float64()
+
+    reader = pa_csv.open_csv(
+        csv_path,
+        read_options=pa_csv.ReadOptions(block_size=CSV_BLOCK_SIZE),
+        convert_options=pa_csv.ConvertOptions(column_types=column_types),
+    )
+
+    writer = None
+    rows = 0
+    try:
+        for batch in reader:
+            columns = []
+            for name, column in zip(batch.schema.names, batch.columns):
+                if name == "REF_DATE":
+                    column = _parse_ref_date(column)
+                elif pa.types.is_string(column.type):
+                    column = column.dictionary_encode()
+                columns.append(column)
+            table = pa.Table.from_arrays(columns, names=batch.schema.names)
+            if writer is None:
+                writer = pq.ParquetWriter(partial_path, table.schema, compression="zstd")
+            writer.write_table(table, row_group_size=ROW_GROUP_SIZE)
+            rows += table.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if writer is None:
+        return None
+    os.replace(partial_path, parquet_path)
+
+    csv_mb = os.path.getsize(csv_path) / 1e6
+    parquet_mb = os.path.getsize(parquet_path) / 1e6
+    print(
+        f"Staged {rows} rows to {parquet_path} "
+        f"({csv_mb:.1f} MB csv -> {parquet_mb:.1f} MB parquet, {time.perf_counter() - start:.1f}s)"
+    )
+    return parquet_path
+
+def _staged_filters(parquet_path, filters):
+    available = set(pq.read_schema(parquet_path).names)
+    return {col: val for col, val in (filters or {}).items() if col in available}
+
+def read_staged(csv_path, columns, filters=None):
+    """
+    Reads only `columns` from the Parquet copy of csv_path, pushing the
+    equality `filters` ({column: value}) down to the row-group level.
+    Filters on columns the file doesn't have are ignored.
+    Returns None if there is no fresh Parquet copy, so callers can fall back to CSV.
+    """
+    if pa is None or not is_stage_fresh(csv_path):
+        return None
+
+    parquet_path = staged_path(csv_path)
+    filters = _staged_filters(parquet_path, filters)
+    predicate = [(col, "==", val) for col, val in filters.items()] or None
+
+    return pd.read_parquet(parquet_path, columns=columns, filters=predicate)
+
+def iter_staged(csv_path, columns, filters=None, batch_size=100_000):
+    """
+    Streaming counterpart of read_staged: yields DataFrames of at most
+    batch_size rows, with the filters evaluated by the scanner so row groups
+    that can't match are skipped. Returns None if there is no fresh Parquet copy.
+    """
+    if pa is None or not is_stage_fresh(csv_path):
+        return None
+
+    parquet_path = staged_path(csv_path)
+    expression = None
+    for col, val in _staged_filters(parquet_path, filters).items():
+        term = ds.field(col) == val
+        expression = term if expression is None else expression & term
+
+    dataset = ds.dataset(parquet_path, format="parquet")
+    batches = dataset.to_batches(columns=columns, filter=expression, batch_size=batch_size)
+    return (batch.to_pandas() for batch in batches if batch.num_rows)
@@ -0,0 +1,137 @@
+from dataclasses import dataclass, field
+
+# ---- Dimensions ----
+
+@dataclass(frozen=True)
+class DimensionSpec:
+    """
+    A dimension table and the natural key column used to look up its surrogate id.
+    """
+    name: str
+    table: str
+    key_column: str
+    id_column: str
+
+DIMENSIONS = {
+    'date': DimensionSpec('date', 'dim_date', 'full_date', 'date_id'),
+    'geography': DimensionSpec('geography', 'dim_geography', 'province_name', 'geo_id'),
+    'product': DimensionSpec('product', 'dim_product', 'product_name', 'product_id'),
+    'industry': DimensionSpec('industry', 'dim_industry', 'industry_name', 'industry_id'),
+}
+
+# ---- Tables ----
+
+# Fact tables are RANGE-partitioned on this column (sql/migrations/0002)
+PARTITION_COLUMN = 'year'
+
+@dataclass(frozen=True)
+class TableSpec:
+    """
+    Everything the generic extract/transform/load engine needs to know about one StatCan table.
+
+    columns:     StatCan column -> normalized frame column, in output order.
+                 Must produce 'date' and 'value'.
+    filters:     {StatCan column: value} rows must match; skipped if the column is absent.
+    dimensions:  frame column -> dimension name (a key of DIMENSIONS).
+    fact_table:  table the mapped rows are inserted into.
+    constants:   extra fact columns with a fixed value, e.g. {'unit': 'Dollars'}.
+    """
+    name: str
+    table_id: str
+    filename: str
+    description: str
+    columns: dict
+    fact_table: str
+    dimensions: dict
+    filters: dict = field(default_factory=dict)
+    constants: dict = field(default_factory=dict)
+
+    @property
+    def source_columns(self):
+        return list(self.columns)
+
+    @property
+    def frame_columns(self):
+        return list(self.columns.values())
+
+    @property
+    def fact_columns(self):
+        """
+        Target columns in the fact table, in the order rows are built.
+        Fact tables are partitioned by year, so every row carries its year too.
+        """
+        dim_ids = [DIMENSIONS[dim].id_column for dim in self.dimensions.values()]
+        return dim_ids + [PARTITION_COLUMN, 'value'] + list(self.constants)
+
+TABLE_SPECS = {}
+
+def register_table(spec):
+    """
+    Adds a table to the registry. Registering a spec is all it takes for the
+    extractor, transformers and loader to pick the table up.
+    """
+    unknown = set(spec.dimensions.values()) - set(DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Table {spec.name} binds unknown dimensions: {sorted(unknown)}")
+    if not {'date', 'value'} <= set(spec.frame_columns):
+        raise ValueError(f"Table {spec.name} must map a 'date' and a 'value' column")
+    TABLE_SPECS[spec.name] = spec
+    return spec
+
+def specs_for_fact_table(fact_table):
+    return [spec for spec in TABLE_SPECS.values() if spec.fact_table == fact_table]
+
+def fact_key_columns(fact_table):
+    """
+    The natural key of a fact table: the dimension id columns its specs bind,
+    e.g. (date_id, geo_id, product_id) for fact_cpi.
+    """
+    spec = specs_for_fact_table(fact_table)[0]
+    return [DIMENSIONS[dim].id_column for dim in spec.dimensions.values()]
+
+def fact_tables():
+    return list(dict.fromkeys(spec.fact_table for spec in TABLE_SPECS.values()))
+
+NAICS_COLUMN = 'North American Industry Classification System (NAICS)'
+
+register_table(TableSpec(
+    name='cpi',
+    table_id='18100004',
+    filename='cpi_monthly.csv',
+    description='CPI',
+    # We want: REF_DATE (Date), GEO (Geography), Products and product groups (Product), VALUE
+    columns={'REF_DATE': 'date', 'GEO': 'geography', 'Products and product groups': 'product', 'VALUE': 'value'},
+    fact_table='fact_cpi',
+    dimensions={'date': 'date', 'geography': 'geography', 'product': 'product'},
+))
+
+# Look for 'Adjustments' column. We usually want 'Seasonally adjusted' for economic analysis,
+# or 'Unadjusted' depending on user preference. The design doc mentions "Real vs Nominal",
+# which often implies using Unadjusted + CPI adjustment, or Seasonally adjusted for trend.
+# Let's keep both or specific one? Let's filter for "Seasonally adjusted" as default for trends.
+register_table(TableSpec(
+    name='retail_industry',
+    table_id='20100008',
+    filename='retail_sales_industry.csv',
+    description='Retail Industry',
+    columns={'REF_DATE': 'date', 'GEO': 'geography', NAICS_COLUMN: 'industry', 'VALUE': 'value'},
+    filters={'Adjustments': 'Seasonally adjusted'},
+    fact_table='fact_retail_sales',
+    dimensions={'date': 'date', 'geography': 'geography', 'industry': 'industry'},
+    # We assume 'Dollars' for unit for now based on CSV review
+    constants={'unit': 'Dollars'},
+))
+
+# Columns: REF_DATE, GEO, NAICS, Sales, Adjustments, VALUE
+# Filter for 'Total retail sales' type only to simplify for now
+register_table(TableSpec(
+    name='retail_province',
+    table_id='20100056',
+    filename='retail_sales_province.csv',
+    description='Retail Province',
+    columns={'REF_DATE': 'date', 'GEO': 'geography', NAICS_COLUMN: 'industry', 'VALUE': 'value'},
+    filters={'Sales': 'Total retail sales', 'Adjustments': 'Seasonally adjusted'},
+    fact_table='fact_retail_sales',
+    dimensions={'date': 'date', 'geography': 'geography', 'industry': 'industry'},
+    constants={'unit': 'Dollars'},
+))
@@ -1,18 +1,70 @@
 import pandas as pd
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+from etl.staging import read_staged, iter_staged
+from etl.table_specs import TABLE_SPECS
 
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data")
 
-def transform_cpi(input_file="cpi_monthly.csv"):
-    print("Transforming CPI data...")
-    df = pd.read_csv(os.path.join(DATA_DIR, input_file))
-    
-    # Select relevant columns
-    # We want: REF_DATE (Date), GEO (Geography), Products and product groups (Product), VALUE
-    df = df[['REF_DATE', 'GEO', 'Products and product groups', 'VALUE']]
-    
+# Rows per chunk in streaming mode; peak memory scales with this, not the file size
+CHUNK_ROWS = 100_000
+
+def _read_source(input_file, columns, filters=None):
+    """
+    Reads only `columns` from an extracted StatCan table, keeping rows that match
+    every {column: value} in `filters` (filters on absent columns are skipped).
+    Uses the Parquet staging copy when one is fresh, otherwise parses the CSV.
+    """
+    csv_path = os.path.join(DATA_DIR, input_file)
+    filters = filters or {}
+
+    df = read_staged(csv_path, columns, filters)
+    if df is not None:
+        return df
+
+    df = pd.read_csv(csv_path, **_csv_options(columns, filters))
+    return _apply_filters(df, columns, filters)
+
+def _iter_source(input_file, columns, filters=None, chunksize=CHUNK_ROWS):
+    """
+    Chunked counterpart of _read_source: yields filtered frames of at most
+    `chunksize` rows so the whole table is never held in memory.
+    """
+    csv_path = os.path.join(DATA_DIR, input_file)
+    filters = filters or {}
+
+    chunks = iter_staged(csv_path, columns, filters, batch_size=chunksize)
+    if chunks is not None:
+        yield from chunks
+        return
+
+    with pd.read_csv(csv_path, chunksize=chunksize, **_csv_options(columns, filters)) as reader:
+        for chunk in reader:
+            chunk = _apply_filters(chunk, columns, filters)
+            if not chunk.empty:
+                yield chunk
+
+def _csv_options(columns, filters):
+    wanted = set(columns) | set(filters)
+    dtype = {col: 'category' for col in wanted if col not in ('REF_DATE', 'VALUE')}
+    dtype['VALUE'] = 'float64'
+    return {'usecols': lambda c: c in wanted, 'dtype': dtype}
+
+def _apply_filters(df, columns, filters):
+    for col, val in filters.items():
+        if col in df.columns:
+            df = df[df[col] == val]
+    return df[columns]
+
+def _normalize(df, names):
+    """
+    Renames the selected StatCan columns to our internal names,
+    drops missing values and parses the date.
+    """
     # Rename columns to match our internal naming convention or schema expectations
-    df.columns = ['date', 'geography', 'product', 'value']
+    df = df.set_axis(names, axis=1)
     
     # Filter out rows with missing values
     df = df.dropna(subset=['value'])
@@ -22,58 +74,29 @@ def transform_cpi(input_file="cpi_monthly.csv"):
     
     return df
 
-def transform_retail_industry(input_file="retail_sales_industry.csv"):
-    print("Transforming Retail Industry data...")
-    df = pd.read_csv(os.path.join(DATA_DIR, input_file), dtype={'North American Industry Classification System (NAICS)': str})
-    
-    # Look for 'Adjustments' column. We usually want 'Seasonally adjusted' for economic analysis, 
-    # or 'Unadjusted' depending on user preference. The design doc mentions "Real vs Nominal", 
-    # which often implies using Unadjusted + CPI adjustment, or Seasonally adjusted for trend.
-    # Let's keep both or specific one? Let's filter for "Seasonally adjusted" as default for trends.
-    if 'Adjustments' in df.columns:
-        df = df[df['Adjustments'] == 'Seasonally adjusted']
-    
-    df = df[['REF_DATE', 'GEO', 'North American Industry Classification System (NAICS)', 'VALUE']]
-    df.columns = ['date', 'geography', 'industry', 'value']
-    
-    df = df.dropna(subset=['value'])
-    df['date'] = pd.to_datetime(df['date'])
-    
-    return df
+def transform_table(spec, input_file=None):
+    """
+    Reads and normalizes the table described by `spec` in one pass.
+    """
+    print(f"Transforming {spec.description} data...")
+    df = _read_source(input_file or spec.filename, spec.source_columns, spec.filters)
+    return _normalize(df, spec.frame_columns)
 
-def transform_retail_province(input_file="retail_sales_province.csv"):
-    print("Transforming Retail Province data...")
-    df = pd.read_csv(os.path.join(DATA_DIR, input_file))
-    
-    # Columns: REF_DATE, GEO, NAICS, Sales, Adjustments, VALUE
-    # Filter for 'Total retail sales' type only to simplify for now
-    if 'Sales' in df.columns:
-        df = df[df['Sales'] == 'Total retail sales']
-        
-    if 'Adjustments' in df.columns:
-        df = df[df['Adjustments'] == 'Seasonally adjusted']
-        
-    df = df[['REF_DATE', 'GEO', 'North American Industry Classification System (NAICS)', 'VALUE']]
-    df.columns = ['date', 'geography', 'industry', 'value']
-    
-    df = df.dropna(subset=['value'])
-    df['date'] = pd.to_datetime(df['date'])
-    
-    return df
+def iter_transform_table(spec, input_file=None, chunksize=CHUNK_ROWS):
+    """
+    Streaming variant of transform_table: yields normalized frames chunk by chunk,
+    so the loader can consume tables larger than memory.
+    """
+    print(f"Transforming {spec.description} data (streaming)...")
+    for chunk in _iter_source(input_file or spec.filename, spec.source_columns, spec.filters, chunksize):
+        yield _normalize(chunk, spec.frame_columns)
 
 if __name__ == "__main__":
     # Test transformations
     try:
-        cpi_df = transform_cpi()
-        print(f"CPI Data: {cpi_df.shape}")
-        print(cpi_df.head())
-        
-        ind_df = transform_retail_industry()
-        print(f"Retail Industry Data: {ind_df.shape}")
-        print(ind_df.head())
-        
-        prov_df = transform_retail_province()
-        print(f"Retail Province Data: {prov_df.shape}")
-        print(prov_df.head())
+        for spec in TABLE_SPECS.values():
+            df = transform_table(spec)
+            print(f"{spec.description} Data: {df.shape}")
+            print(df.head())
     except Exception as e:
         print(f"Error during transformation: {e}")
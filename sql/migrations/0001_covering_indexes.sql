@@ -0,0 +1,17 @@
+-- Covering indexes for the dashboard queries in streamlit_app/db_utils.py.
+-- Each one leads with the columns the queries filter on and ends with value,
+-- so series and point lookups are answered from the index alone.
+
+-- get_cpi_data: one province, All-items, a date range
+ALTER TABLE fact_cpi
+    ADD INDEX ix_fact_cpi_geo_product_date (geo_id, product_id, date_id, value);
+
+-- get_retail_data / get_seasonal_data / industry distribution: one province (and industry), by date
+-- get_provincial_comparison: one industry across provinces on a given date
+ALTER TABLE fact_retail_sales
+    ADD INDEX ix_fact_retail_geo_industry_date (geo_id, industry_id, date_id, value),
+    ADD INDEX ix_fact_retail_industry_date_geo (industry_id, date_id, geo_id, value);
+
+-- get_seasonal_data filters on year; date range filters use UNIQUE(full_date)
+ALTER TABLE dim_date
+    ADD INDEX ix_dim_date_year_month (year, month);
@@ -0,0 +1,88 @@
+"""
+RANGE-partitions the fact tables by year so date-bounded queries only touch
+the partitions they need.
+
+MySQL requires the partitioning column in every unique key and doesn't allow
+foreign keys on partitioned InnoDB tables, so each fact table:
+  * gets a `year` column (backfilled from dim_date and written by the loader),
+  * has `year` appended to its primary and natural keys,
+  * loses its foreign keys. Ids only ever come from the loader's dimension
+    maps, and the single-column indexes that backed those keys are covered
+    by the indexes from migration 0001.
+"""
+import datetime
+
+FACT_TABLES = ('fact_cpi', 'fact_retail_sales')
+
+# Everything before this shares one partition; later years get one each
+FIRST_YEARLY_PARTITION = 2000
+# Yearly partitions are created up to this many years ahead; later rows land in p_future
+YEARS_AHEAD = 5
+
+def _rows(cursor, query, params):
+    cursor.execute(query, params)
+    return cursor.fetchall()
+
+def _partition_clause():
+    last = datetime.date.today().year + YEARS_AHEAD
+    partitions = [f"PARTITION p_before_{FIRST_YEARLY_PARTITION} VALUES LESS THAN ({FIRST_YEARLY_PARTITION})"]
+    partitions += [f"PARTITION p{year} VALUES LESS THAN ({year + 1})" for year in range(FIRST_YEARLY_PARTITION, last + 1)]
+    partitions.append("PARTITION p_future VALUES LESS THAN MAXVALUE")
+    return "PARTITION BY RANGE (year) (\n    " + ",\n    ".join(partitions) + "\n)"
+
+def _partition_table(cursor, table):
+    partitioned = _rows(cursor, """
+        SELECT COUNT(*) FROM information_schema.partitions
+        WHERE table_schema = DATABASE() AND table_name = %s AND partition_name IS NOT NULL
+    """, (table,))[0][0]
+    if partitioned:
+        return
+
+    foreign_keys = _rows(cursor, """
+        SELECT constraint_name FROM information_schema.referential_constraints
+        WHERE constraint_schema = DATABASE() AND table_name = %s
+    """, (table,))
+    if foreign_keys:
+        cursor.execute(f"ALTER TABLE {table} " + ", ".join(f"DROP FOREIGN KEY {name}" for (name,) in foreign_keys))
+
+    has_year = _rows(cursor, """
+        SELECT COUNT(*) FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = 'year'
+    """, (table,))[0][0]
+    if not has_year:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN year SMALLINT NOT NULL DEFAULT 0 AFTER date_id")
+    cursor.execute(f"UPDATE {table} f JOIN dim_date d ON f.date_id = d.date_id SET f.year = d.year")
+
+    indexes = {}
+    for name, non_unique, column in _rows(cursor, """
+        SELECT index_name, non_unique, column_name FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s
+        ORDER BY index_name, seq_in_index
+    """, (table,)):
+        indexes.setdefault(name, (not non_unique, []))[1].append(column)
+
+    clauses = []
+    for name, (unique, columns) in indexes.items():
+        if unique and 'year' in columns:
+            # Already widened by an earlier, interrupted run of this migration
+            continue
+        if name == 'PRIMARY':
+            clauses += ["DROP PRIMARY KEY", f"ADD PRIMARY KEY ({', '.join(columns + ['year'])})"]
+        elif unique:
+            clauses += [f"DROP INDEX {name}", f"ADD UNIQUE KEY {name} ({', '.join(columns + ['year'])})"]
+        elif len(columns) == 1 and any(
+            other != name and len(cols) > 1 and cols[0] == columns[0] for other, (_, cols) in indexes.items()
+        ):
+            # Leftover foreign key index, now a prefix of a covering index
+            clauses.append(f"DROP INDEX {name}")
+    if clauses:
+        cursor.execute(f"ALTER TABLE {table} " + ", ".join(clauses))
+
+    print(f"Partitioning {table} by year...")
+    cursor.execute(f"ALTER TABLE {table} {_partition_clause()}")
+
+def upgrade(conn):
+    cursor = conn.cursor()
+    for table in FACT_TABLES:
+        _partition_table(cursor, table)
+    cursor.close()
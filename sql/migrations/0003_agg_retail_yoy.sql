@@ -0,0 +1,34 @@
+-- Year-over-year retail sales per (province, industry, month), maintained by
+-- the loader (etl/loaders/aggregates.py) for the months each load touches.
+-- Replaces the three-CTE MAX(full_date) queries behind "Industry Winners &
+-- Losers" and the provincial heatmap with indexed point lookups.
+CREATE TABLE IF NOT EXISTS agg_retail_yoy (
+    geo_id INT NOT NULL,
+    industry_id INT NOT NULL,
+    ref_month DATE NOT NULL,
+    current_value DECIMAL(15, 2),
+    prev_value DECIMAL(15, 2),     -- same month a year earlier, NULL if not loaded
+    yoy_growth DECIMAL(12, 4),     -- percent, NULL without a (non-zero) prior year
+    PRIMARY KEY (geo_id, ref_month, industry_id),
+    KEY ix_agg_retail_yoy_industry (industry_id, ref_month, geo_id),
+    KEY ix_agg_retail_yoy_month (ref_month)
+);
+
+-- Backfill from whatever is already loaded
+INSERT INTO agg_retail_yoy (geo_id, industry_id, ref_month, current_value, prev_value, yoy_growth)
+SELECT
+    c.geo_id,
+    c.industry_id,
+    dc.full_date,
+    c.value,
+    p.value,
+    CASE WHEN p.value <> 0 THEN (c.value - p.value) / p.value * 100 END
+FROM fact_retail_sales c
+JOIN dim_date dc ON c.date_id = dc.date_id
+LEFT JOIN dim_date dp ON dp.full_date = DATE_SUB(dc.full_date, INTERVAL 1 YEAR)
+LEFT JOIN fact_retail_sales p
+    ON p.date_id = dp.date_id AND p.geo_id = c.geo_id AND p.industry_id = c.industry_id
+ON DUPLICATE KEY UPDATE
+    current_value = VALUES(current_value),
+    prev_value = VALUES(prev_value),
+    yoy_growth = VALUES(yoy_growth);
@@ -0,0 +1,48 @@
+-- Nominal sales, All-items CPI and CPI-deflated (real) sales per
+-- (province, industry, month), with their year-over-year changes.
+-- Maintained by the loader (etl/loaders/aggregates.py) so the Deep Dive tab
+-- reads one indexed range instead of joining CPI and sales client-side.
+CREATE TABLE IF NOT EXISTS agg_real_sales (
+    geo_id INT NOT NULL,
+    industry_id INT NOT NULL,
+    ref_month DATE NOT NULL,
+    sales DECIMAL(15, 2),
+    cpi DECIMAL(10, 2),
+    real_sales DECIMAL(18, 2),     -- sales / (cpi / 100)
+    sales_yoy DECIMAL(12, 4),      -- percent; NULL without the same month a year earlier
+    cpi_yoy DECIMAL(12, 4),
+    real_sales_yoy DECIMAL(12, 4),
+    PRIMARY KEY (geo_id, industry_id, ref_month),
+    KEY ix_agg_real_sales_month (ref_month)
+);
+
+-- Backfill from whatever is already loaded
+INSERT INTO agg_real_sales
+    (geo_id, industry_id, ref_month, sales, cpi, real_sales, sales_yoy, cpi_yoy, real_sales_yoy)
+SELECT
+    s.geo_id,
+    s.industry_id,
+    ds.full_date,
+    s.value,
+    c.value,
+    CASE WHEN c.value <> 0 THEN s.value / (c.value / 100) END,
+    CASE WHEN ps.value <> 0 THEN (s.value - ps.value) / ps.value * 100 END,
+    CASE WHEN pc.value <> 0 THEN (c.value - pc.value) / pc.value * 100 END,
+    CASE WHEN c.value <> 0 AND ps.value <> 0 AND pc.value <> 0
+         THEN ((s.value / c.value) / (ps.value / pc.value) - 1) * 100 END
+FROM fact_retail_sales s
+JOIN dim_date ds ON s.date_id = ds.date_id
+JOIN dim_product ap ON ap.product_name = 'All-items'
+JOIN fact_cpi c ON c.date_id = s.date_id AND c.geo_id = s.geo_id AND c.product_id = ap.product_id
+LEFT JOIN dim_date dp ON dp.full_date = DATE_SUB(ds.full_date, INTERVAL 1 YEAR)
+LEFT JOIN fact_retail_sales ps
+    ON ps.date_id = dp.date_id AND ps.geo_id = s.geo_id AND ps.industry_id = s.industry_id
+LEFT JOIN fact_cpi pc
+    ON pc.date_id = dp.date_id AND pc.geo_id = s.geo_id AND pc.product_id = ap.product_id
+ON DUPLICATE KEY UPDATE
+    sales = VALUES(sales),
+    cpi = VALUES(cpi),
+    real_sales = VALUES(real_sales),
+    sales_yoy = VALUES(sales_yoy),
+    cpi_yoy = VALUES(cpi_yoy),
+    real_sales_yoy = VALUES(real_sales_yoy);
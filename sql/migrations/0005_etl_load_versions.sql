@@ -0,0 +1,8 @@
+-- One row per ETL load that changed the warehouse. The newest row's manifest
+-- (JSON: geographies, industries with categories, dates per fact table) is
+-- what the dashboard reads at startup instead of querying the dimensions.
+CREATE TABLE IF NOT EXISTS etl_load_versions (
+    load_version BIGINT AUTO_INCREMENT PRIMARY KEY,
+    manifest MEDIUMTEXT NOT NULL,
+    published_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
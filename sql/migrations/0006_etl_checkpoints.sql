@@ -0,0 +1,12 @@
+-- ETL bookkeeping: the last input hash and status of every pipeline stage
+-- (etl/pipeline.py), so a rerun resumes at the stage that failed and skips
+-- tables whose source data hasn't changed.
+CREATE TABLE IF NOT EXISTS etl_checkpoints (
+    stage VARCHAR(50) NOT NULL,
+    scope VARCHAR(100) NOT NULL,
+    input_hash CHAR(64) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    detail TEXT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (stage, scope)
+);
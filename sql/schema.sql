@@ -35,6 +35,7 @@ CREATE TABLE IF NOT EXISTS fact_cpi (
     geo_id INT,
     product_id INT,
     value DECIMAL(10, 2),
+    UNIQUE KEY uq_fact_cpi_natural (date_id, geo_id, product_id),
     FOREIGN KEY (date_id) REFERENCES dim_date(date_id),
     FOREIGN KEY (geo_id) REFERENCES dim_geography(geo_id),
     FOREIGN KEY (product_id) REFERENCES dim_product(product_id)
@@ -48,6 +49,7 @@ CREATE TABLE IF NOT EXISTS fact_retail_sales (
     industry_id INT,
     value DECIMAL(15, 2), -- Large numbers for sales
     unit VARCHAR(50), -- e.g., 'Dollars', 'Percentage'
+    UNIQUE KEY uq_fact_retail_sales_natural (date_id, geo_id, industry_id),
     FOREIGN KEY (date_id) REFERENCES dim_date(date_id),
     FOREIGN KEY (geo_id) REFERENCES dim_geography(geo_id),
     FOREIGN KEY (industry_id) REFERENCES dim_industry(industry_id)
@@ -1,9 +1,15 @@
+import os
+import sys
 import streamlit as st
 import pandas as pd
 import altair as alt
 import db_utils
 from datetime import date, timedelta
 
+# Industry categories are shared with the ETL (etl/categories.py has no database imports)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from etl.categories import categorize_industry
+
 # ---- Configuration ----
 st.set_page_config(
     page_title="Canadian Inflation Monitor",
@@ -46,16 +52,28 @@ st.markdown("""
 
 # ---- Helper Functions ----
 @st.cache_data
-def load_metadata():
-    provinces = db_utils.get_provinces()['province_name'].tolist()
-    industries = db_utils.get_industries()['industry_name'].tolist()
-    return provinces, industries
+def load_metadata(data_version):
+    """
+    Reads the manifest the ETL publishes with every load: one small query
+    instead of scanning the dimensions. Falls back to the dimension tables
+    if no manifest has been published yet.
+    Cached per data_version, so a new ETL load refreshes it.
+    Returns (provinces, industries, {industry: category}, manifest or None).
+    """
+    manifest = db_utils.get_metadata_manifest()
+    if manifest is None:
+        provinces = db_utils.get_provinces()['province_name'].tolist()
+        industries = db_utils.get_industries()['industry_name'].tolist()
+        return provinces, industries, {i: categorize_industry(i) for i in industries}, None
+    industries = [i['name'] for i in manifest['industries']]
+    categories = {i['name']: i['category'] for i in manifest['industries']}
+    return manifest['geographies'], industries, categories, manifest
 
 # ---- Sidebar ----
 st.sidebar.header("Configuration")
 
 # Load Metadata
-provinces_list, industries_list = load_metadata()
+provinces_list, industries_list, industry_category, metadata = load_metadata(db_utils.get_data_version())
 
 # 1. Geography Selection
 st.sidebar.subheader("📍 Geography")
@@ -90,30 +108,8 @@ selected_province = st.sidebar.selectbox("Select Location", filtered_geos, index
 # 2. Industry Selection
 st.sidebar.subheader("🏢 Industry")
 
-# Categorize Industries for better UX
-def categorize_industry(name):
-    name = name.lower()
-    if any(x in name for x in ['motor', 'auto', 'gasoline', 'car']):
-        return "Automotive & Fuel"
-    elif any(x in name for x in ['food', 'beverage', 'grocery', 'beer', 'wine', 'liquor', 'supermarket', 'convenience']):
-        return "Food & Beverage"
-    elif any(x in name for x in ['clothing', 'shoe', 'jewelry', 'luggage', 'fashion']):
-        return "Clothing & Accessories"
-    elif any(x in name for x in ['furniture', 'electronic', 'appliance', 'furnishing']):
-        return "Home & Electronics"
-    elif any(x in name for x in ['building', 'garden', 'hardware']):
-        return "Building & Garden"
-    elif any(x in name for x in ['sporting', 'hobby', 'book', 'music']):
-        return "Hobbies & Leisure"
-    elif any(x in name for x in ['health', 'personal']):
-        return "Health & Personal Care"
-    elif 'retail trade' in name:
-        return "All Retail"
-    else:
-        return "General & Other"
-
 # Create categories
-industry_categories = sorted(list(set([categorize_industry(i) for i in industries_list])))
+industry_categories = sorted(list(set(industry_category.values())))
 # Move "All Retail" to top
 if "All Retail" in industry_categories:
     industry_categories.insert(0, industry_categories.pop(industry_categories.index("All Retail")))
@@ -121,7 +117,7 @@ if "All Retail" in industry_categories:
 selected_category = st.sidebar.selectbox("Filter Industry Category", industry_categories)
 
 # Filter industries by category
-filtered_inds = [i for i in industries_list if categorize_industry(i) == selected_category]
+filtered_inds = [i for i in industries_list if industry_category[i] == selected_category]
 
 # Default selection logic
 default_ind = filtered_inds[0] if filtered_inds else industries_list[0]
@@ -145,48 +141,43 @@ start_date, end_date = st.sidebar.date_input(
 # ---- Main Content ----
 st.markdown('<div class="main-header">Canadian Inflation & Recession Monitor</div>', unsafe_allow_html=True)
 
-# Create tabs for different views
-tab1, tab2 = st.tabs(["📉 Deep Dive Analysis", "🇨🇦 National Dashboard"])
+# Latest loaded retail month in the selected range, known from the manifest (None = look it up)
+latest_retail_date = db_utils.latest_loaded_date(metadata, 'fact_retail_sales', end_date)
 
-with tab1:
+# View selector instead of st.tabs: tabs run every tab's code (and queries) on
+# each rerun, while only the selected view is built here
+DEEP_DIVE_VIEW = "📉 Deep Dive Analysis"
+NATIONAL_VIEW = "🇨🇦 National Dashboard"
+selected_view = st.radio("View", [DEEP_DIVE_VIEW, NATIONAL_VIEW], horizontal=True, label_visibility="collapsed")
+
+if selected_view == DEEP_DIVE_VIEW:
     st.markdown(f'<div class="sub-header">Analyzing the impact of inflation on {selected_industry} in {selected_province}</div>', unsafe_allow_html=True)
 
-    # Fetch Data
+    # Fetch Data: every query of this view at once, in parallel
     with st.spinner("Fetching data from MySQL..."):
-        cpi_df = db_utils.get_cpi_data(selected_province, start_date, end_date)
-        sales_df = db_utils.get_retail_data(selected_province, selected_industry, start_date, end_date)
+        frames = db_utils.fetch_all({
+            # Nominal, CPI and real sales come pre-joined from agg_real_sales
+            'sales': (db_utils.get_real_sales_data, selected_province, selected_industry, start_date, end_date),
+            'seasonal': (db_utils.get_seasonal_data, selected_province, selected_industry, end_date.year),
+            'distribution': (db_utils.get_industry_distribution, selected_province, end_date, latest_retail_date),
+        })
+    merged_df = frames['sales']
 
-    if cpi_df.empty or sales_df.empty:
+    if merged_df.empty:
         st.warning("No data found for the selected combination. Please try expanding the date range or choosing a different industry.")
     else:
-        # Merge Data
-        cpi_df['date'] = pd.to_datetime(cpi_df['date'])
-        sales_df['date'] = pd.to_datetime(sales_df['date'])
-        
-        merged_df = pd.merge(sales_df, cpi_df, on='date', how='inner')
-        
-        # Calculate Real Sales
-        # Real Sales = Nominal Sales / (CPI / 100)
-        merged_df['real_sales'] = merged_df['sales'] / (merged_df['cpi'] / 100.0)
+        merged_df['date'] = pd.to_datetime(merged_df['date'])
+        numeric_cols = ['sales', 'cpi', 'real_sales', 'sales_yoy', 'cpi_yoy', 'real_sales_yoy']
+        merged_df[numeric_cols] = merged_df[numeric_cols].astype(float)
         
         # ---- KPIs ----
         latest_data = merged_df.iloc[-1]
         
-        # Calculate YoY for latest month available
-        # Find exactly 1 year ago row
-        one_year_ago = latest_data['date'] - pd.DateOffset(years=1)
-        # Find closest date match
-        prev_year_row = merged_df.loc[merged_df['date'] == one_year_ago]
-        
-        if not prev_year_row.empty:
-            prev_year_data = prev_year_row.iloc[0]
-            cpi_yoy = ((latest_data['cpi'] - prev_year_data['cpi']) / prev_year_data['cpi']) * 100
-            sales_yoy = ((latest_data['sales'] - prev_year_data['sales']) / prev_year_data['sales']) * 100
-            real_sales_yoy = ((latest_data['real_sales'] - prev_year_data['real_sales']) / prev_year_data['real_sales']) * 100
-        else:
-             cpi_yoy = 0
-             sales_yoy = 0
-             real_sales_yoy = 0
+        # YoY for the latest month, precomputed against the same month a year earlier
+        # (0 when that month isn't loaded)
+        cpi_yoy = latest_data['cpi_yoy'] if pd.notna(latest_data['cpi_yoy']) else 0
+        sales_yoy = latest_data['sales_yoy'] if pd.notna(latest_data['sales_yoy']) else 0
+        real_sales_yoy = latest_data['real_sales_yoy'] if pd.notna(latest_data['real_sales_yoy']) else 0
         
         col1, col2, col3 = st.columns(3)
         col1.metric("CPI Inflation (YoY)", f"{cpi_yoy:.2f}%", delta_color="inverse")
@@ -194,12 +185,16 @@ with tab1:
         col3.metric("Real Volume Growth (YoY)", f"{real_sales_yoy:.2f}%", help="Sales adjusted for inflation")
 
         # ---- Charts ----
+        # The line chart gets a shape-preserving sample, so the payload sent to the
+        # browser stays bounded for long ranges; KPIs, the elasticity scatter and
+        # the raw table use every month
+        chart_df = db_utils.downsample_frame(merged_df, 'date', ['sales', 'real_sales'], db_utils.CHART_MAX_POINTS)
         
         # Chart 1: Nominal vs Real Sales
         st.markdown("### Purchasing Power Erosion")
         st.write("Discrepancy between the money spent (Nominal) and the actual volume of goods purchased (Real).")
         
-        melted_df = merged_df.melt(id_vars=['date'], value_vars=['sales', 'real_sales'], var_name='Metric', value_name='Amount')
+        melted_df = chart_df.melt(id_vars=['date'], value_vars=['sales', 'real_sales'], var_name='Metric', value_name='Amount')
         melted_df['Metric'] = melted_df['Metric'].map({'sales': 'Nominal Sales', 'real_sales': 'Real Sales (Adj)'})
         
         chart_sales = alt.Chart(melted_df).mark_line(point=False).encode(
@@ -217,7 +212,7 @@ with tab1:
         with row2_col1:
             st.markdown("### 🍂 Seasonality Analysis")
             st.write("Comparing monthly sales trends across years.")
-            seasonal_df = db_utils.get_seasonal_data(selected_province, selected_industry, end_date.year)
+            seasonal_df = frames['seasonal']
             
             if not seasonal_df.empty:
                 chart_seasonal = alt.Chart(seasonal_df).mark_line(point=True).encode(
@@ -233,11 +228,11 @@ with tab1:
         with row2_col2:
             st.markdown(f"### 🥧 Wallet Share ({selected_province})")
             st.write("Distribution of retail spending by category.")
-            dist_df = db_utils.get_industry_distribution(selected_province, end_date)
+            dist_df = frames['distribution']
             
             if not dist_df.empty:
                 # Apply categorization
-                dist_df['Category'] = dist_df['industry_name'].apply(categorize_industry)
+                dist_df['Category'] = dist_df['industry_name'].map(lambda name: industry_category.get(name) or categorize_industry(name))
                 # Aggregate
                 pie_df = dist_df.groupby('Category')['sales'].sum().reset_index()
                 # Sort
@@ -277,16 +272,22 @@ with tab1:
         with st.expander("View Raw Data"):
             st.dataframe(merged_df.sort_values('date', ascending=False))
 
-with tab2:
+else:
     st.markdown("### National Economic Snapshot")
     st.write("Comparing performance across industries and provinces for the latest available period.")
+
+    with st.spinner("Fetching data from MySQL..."):
+        frames = db_utils.fetch_all({
+            'industries': (db_utils.get_latest_yoy_growth_by_industry, selected_province, end_date, latest_retail_date),
+            'provinces': (db_utils.get_provincial_comparison, selected_industry, end_date, latest_retail_date),
+        })
     
     # Snapshot Date
     row1_col1, row1_col2 = st.columns(2)
     
     with row1_col1:
         st.subheader(f"Industry Winners & Losers ({selected_province})")
-        ind_growth_df = db_utils.get_latest_yoy_growth_by_industry(selected_province, end_date)
+        ind_growth_df = frames['industries']
         
         if not ind_growth_df.empty:
              # Sort head/tail
@@ -308,7 +309,7 @@ with tab2:
             
     with row1_col2:
         st.subheader(f"Provincial Heatmap: {selected_industry}")
-        prov_growth_df = db_utils.get_provincial_comparison(selected_industry, end_date)
+        prov_growth_df = frames['provinces']
         
         if not prov_growth_df.empty:
              chart_prov = alt.Chart(prov_growth_df).mark_bar().encode(
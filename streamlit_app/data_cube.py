@@ -0,0 +1,228 @@
+import numpy as np
+import pandas as pd
+
+# Excluded from the wallet share chart: it's the total of the other industries
+TOTAL_RETAIL_INDUSTRY = 'Retail trade [44-45]'
+
+def _growth(current, previous):
+    """
+    Percent change, NaN where the previous value is missing or zero
+    (the CASE WHEN prev <> 0 of the summary tables).
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(previous != 0, (current - previous) / previous * 100, np.nan)
+
+class DataCube:
+    """
+    The fact tables held in memory as dense NumPy arrays indexed by
+    (geography, industry, date) positions, answering the dashboard's queries
+    with array slicing instead of SQL.
+
+    Only All-items CPI is kept, the only product the dashboard reads.
+    Each array has a `present` mask next to it, so a missing row and a row
+    with a NULL value stay distinct, as they are in SQL. Values come back as
+    floats rounded to the scale of the matching MySQL column.
+    """
+
+    def __init__(self, geographies, industries, dates, cpi, retail):
+        """
+        geographies: [geo_id, province_name]; industries: [industry_id, industry_name];
+        dates: [date_id, full_date]; cpi: [geo_id, date_id, value] (All-items);
+        retail: [geo_id, industry_id, date_id, value].
+        """
+        self.geo_names = geographies['province_name'].to_numpy(dtype=object)
+        self.industry_names = industries['industry_name'].to_numpy(dtype=object)
+        self._geo_pos = {name: i for i, name in enumerate(self.geo_names)}
+        self._industry_pos = {name: i for i, name in enumerate(self.industry_names)}
+
+        dates = dates.assign(full_date=pd.to_datetime(dates['full_date'])).sort_values('full_date')
+        self.dates = dates['full_date'].to_numpy(dtype='datetime64[D]')
+        self._date_objects = dates['full_date'].dt.date.to_numpy(dtype=object)
+        self.years = dates['full_date'].dt.year.to_numpy()
+        self.months = dates['full_date'].dt.month.to_numpy()
+        # Position of the same date a year earlier, -1 if it isn't in dim_date
+        self.prev_year = pd.DatetimeIndex(self.dates).get_indexer(
+            pd.DatetimeIndex(self.dates) - pd.DateOffset(years=1)
+        )
+
+        geo_index = pd.Index(geographies['geo_id'])
+        industry_index = pd.Index(industries['industry_id'])
+        date_index = pd.Index(dates['date_id'])
+
+        n_geo, n_industry, n_date = len(self.geo_names), len(self.industry_names), len(self.dates)
+        self.cpi, self.cpi_present = self._fill(
+            (n_geo, n_date),
+            [geo_index.get_indexer(cpi['geo_id']), date_index.get_indexer(cpi['date_id'])],
+            cpi['value'],
+        )
+        self.retail, self.retail_present = self._fill(
+            (n_geo, n_industry, n_date),
+            [
+                geo_index.get_indexer(retail['geo_id']),
+                industry_index.get_indexer(retail['industry_id']),
+                date_index.get_indexer(retail['date_id']),
+            ],
+            retail['value'],
+        )
+        # Dates with any retail row, for the "latest loaded month" lookups
+        self.retail_loaded = self.retail_present.any(axis=(0, 1))
+
+    @staticmethod
+    def _fill(shape, positions, values):
+        array = np.full(shape, np.nan)
+        present = np.zeros(shape, dtype=bool)
+        # Facts whose ids aren't in the dimensions wouldn't survive the SQL joins either
+        keep = np.logical_and.reduce([p >= 0 for p in positions])
+        index = tuple(p[keep] for p in positions)
+        array[index] = pd.to_numeric(values, errors='coerce').to_numpy(dtype=float)[keep]
+        present[index] = True
+        return array, present
+
+    @property
+    def nbytes(self):
+        return self.cpi.nbytes + self.cpi_present.nbytes + self.retail.nbytes + self.retail_present.nbytes
+
+    # ---- Lookups ----
+
+    def _date_range(self, start_date, end_date):
+        lo = np.searchsorted(self.dates, np.datetime64(str(start_date)[:10], 'D'), side='left')
+        hi = np.searchsorted(self.dates, np.datetime64(str(end_date)[:10], 'D'), side='right')
+        return slice(lo, hi)
+
+    def _date_position(self, value):
+        d = np.datetime64(str(value)[:10], 'D')
+        i = np.searchsorted(self.dates, d)
+        return int(i) if i < len(self.dates) and self.dates[i] == d else None
+
+    def latest_month(self, date_limit, latest_date=None):
+        """
+        Position of latest_date if given, else of the latest date with retail
+        data on or before date_limit. None if there isn't one.
+        """
+        if latest_date is not None:
+            return self._date_position(latest_date)
+        hi = np.searchsorted(self.dates, np.datetime64(str(date_limit)[:10], 'D'), side='right')
+        loaded = np.flatnonzero(self.retail_loaded[:hi])
+        return int(loaded[-1]) if len(loaded) else None
+
+    # ---- Queries (same columns and row order as db_utils' SQL) ----
+    # The dimensions are loaded ORDER BY name, so the stable sorts below break
+    # ties by name, like the SQL's secondary ORDER BY keys.
+
+    def cpi_series(self, province, start_date, end_date):
+        g = self._geo_pos.get(province)
+        if g is None:
+            return pd.DataFrame(columns=['date', 'cpi'])
+        window = self._date_range(start_date, end_date)
+        rows = self.cpi_present[g, window]
+        return pd.DataFrame({
+            'date': self._date_objects[window][rows],
+            'cpi': self.cpi[g, window][rows],
+        })
+
+    def retail_series(self, province, industry, start_date, end_date):
+        g, i = self._geo_pos.get(province), self._industry_pos.get(industry)
+        if g is None or i is None:
+            return pd.DataFrame(columns=['date', 'sales'])
+        window = self._date_range(start_date, end_date)
+        rows = self.retail_present[g, i, window]
+        return pd.DataFrame({
+            'date': self._date_objects[window][rows],
+            'sales': self.retail[g, i, window][rows],
+        })
+
+    def real_sales(self, province, industry, start_date, end_date):
+        """
+        The agg_real_sales rows for a province and industry: months with both
+        a sales and an All-items CPI row.
+        """
+        columns = ['date', 'sales', 'cpi', 'real_sales', 'sales_yoy', 'cpi_yoy', 'real_sales_yoy']
+        g, i = self._geo_pos.get(province), self._industry_pos.get(industry)
+        if g is None or i is None:
+            return pd.DataFrame(columns=columns)
+        window = np.arange(len(self.dates))[self._date_range(start_date, end_date)]
+        window = window[self.retail_present[g, i, window] & self.cpi_present[g, window]]
+        prev = self.prev_year[window]
+        has_prev = prev >= 0
+        prev = np.where(has_prev, prev, 0)
+
+        sales, cpi = self.retail[g, i, window], self.cpi[g, window]
+        prev_sales = np.where(has_prev & self.retail_present[g, i, prev], self.retail[g, i, prev], np.nan)
+        prev_cpi = np.where(has_prev & self.cpi_present[g, prev], self.cpi[g, prev], np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            real = np.where(cpi != 0, sales / (cpi / 100), np.nan)
+            real_yoy = np.where(
+                (cpi != 0) & (prev_sales != 0) & (prev_cpi != 0),
+                ((sales / cpi) / (prev_sales / prev_cpi) - 1) * 100,
+                np.nan,
+            )
+        return pd.DataFrame({
+            'date': self._date_objects[window],
+            'sales': sales,
+            'cpi': cpi,
+            'real_sales': np.round(real, 2),
+            'sales_yoy': np.round(_growth(sales, prev_sales), 4),
+            'cpi_yoy': np.round(_growth(cpi, prev_cpi), 4),
+            'real_sales_yoy': np.round(real_yoy, 4),
+        }, columns=columns)
+
+    def seasonal(self, province, industry, end_year):
+        g, i = self._geo_pos.get(province), self._industry_pos.get(industry)
+        if g is None or i is None:
+            return pd.DataFrame(columns=['year', 'month', 'sales'])
+        rows = self.retail_present[g, i] & (self.years >= end_year - 2) & (self.years <= end_year)
+        return pd.DataFrame({
+            'year': self.years[rows],
+            'month': self.months[rows],
+            'sales': self.retail[g, i, rows],
+        })
+
+    def industry_distribution(self, province, date_limit, latest_date=None):
+        g = self._geo_pos.get(province)
+        d = self.latest_month(date_limit, latest_date)
+        if g is None or d is None:
+            return pd.DataFrame(columns=['industry_name', 'sales'])
+        rows = self.retail_present[g, :, d] & (self.industry_names != TOTAL_RETAIL_INDUSTRY)
+        df = pd.DataFrame({'industry_name': self.industry_names[rows], 'sales': self.retail[g, rows, d]})
+        return df.sort_values('sales', ascending=False, kind='stable', na_position='last').reset_index(drop=True)
+
+    def _yoy_at(self, d, g=slice(None), i=slice(None)):
+        """
+        (current, previous, growth, rows) for the agg_retail_yoy rows of month d
+        that have a prior-year value (prev_value IS NOT NULL).
+        """
+        p = self.prev_year[d]
+        current = self.retail[g, i, d]
+        rows = self.retail_present[g, i, d]
+        if p < 0:
+            return current, np.full_like(current, np.nan), np.full_like(current, np.nan), np.zeros_like(rows)
+        previous = np.where(self.retail_present[g, i, p], self.retail[g, i, p], np.nan)
+        rows = rows & ~np.isnan(previous)
+        return current, previous, np.round(_growth(current, previous), 4), rows
+
+    def yoy_growth_by_industry(self, province, date_limit, latest_date=None):
+        columns = ['industry_name', 'current_value', 'prev_value', 'yoy_growth']
+        g = self._geo_pos.get(province)
+        d = self.latest_month(date_limit, latest_date)
+        if g is None or d is None:
+            return pd.DataFrame(columns=columns)
+        current, previous, growth, rows = self._yoy_at(d, g=g)
+        df = pd.DataFrame({
+            'industry_name': self.industry_names[rows],
+            'current_value': current[rows],
+            'prev_value': previous[rows],
+            'yoy_growth': growth[rows],
+        }, columns=columns)
+        # MySQL sorts NULLs first in ascending order
+        return df.sort_values('yoy_growth', kind='stable', na_position='first').reset_index(drop=True)
+
+    def provincial_comparison(self, industry, date_limit, latest_date=None, provinces=None):
+        i = self._industry_pos.get(industry)
+        d = self.latest_month(date_limit, latest_date)
+        if i is None or d is None:
+            return pd.DataFrame(columns=['province_name', 'yoy_growth'])
+        _, _, growth, rows = self._yoy_at(d, i=i)
+        if provinces is not None:
+            rows = rows & np.isin(self.geo_names, list(provinces))
+        df = pd.DataFrame({'province_name': self.geo_names[rows], 'yoy_growth': growth[rows]})
+        return df.sort_values('yoy_growth', ascending=False, kind='stable', na_position='last').reset_index(drop=True)
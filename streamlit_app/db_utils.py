@@ -1,46 +1,124 @@
 import os
-import mysql.connector
+import json
+import time
+import bisect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from mysql.connector import pooling
 import pandas as pd
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from dotenv import load_dotenv
+from query_cache import QueryCache
+from data_cube import DataCube
+from warehouse import ParquetWarehouse
+from downsample import downsample_frame
+from window_cache import WindowCache
 
 # Load environment variables
 load_dotenv()
 
+# Connections shared by every browser session of this Streamlit process
+POOL_SIZE = int(os.getenv("DASHBOARD_DB_POOL_SIZE", 5))
+# Seconds a query waits for a free pooled connection before giving up
+POOL_WAIT_SECONDS = float(os.getenv("DASHBOARD_DB_POOL_WAIT", 10))
+
+# Memory budget for cached query results, shared by all sessions
+CACHE_MAX_MB = float(os.getenv("DASHBOARD_CACHE_MB", 64))
+# Date-ranged series (one per province/industry) kept for incremental range changes
+WINDOW_CACHE_SERIES = int(os.getenv("DASHBOARD_WINDOW_CACHE_SERIES", 512))
+# How often to ask MySQL whether the ETL has published a new load version
+VERSION_CHECK_SECONDS = float(os.getenv("DASHBOARD_VERSION_CHECK_SECONDS", 30))
+
+# Point budget per chart for long time series (see downsample_frame)
+CHART_MAX_POINTS = int(os.getenv("DASHBOARD_CHART_POINTS", 400))
+
+# Where queries run: 'mysql', or 'parquet' for DuckDB over the Parquet export
+# the ETL writes to PARQUET_WAREHOUSE_DIR (warehouse.py), with no database server
+DATA_BACKEND = os.getenv("DASHBOARD_BACKEND", "mysql")
+PARQUET_DIR = os.getenv(
+    "PARQUET_WAREHOUSE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "warehouse")
+)
+
+# 'cube' answers the dashboard's queries from in-memory arrays (data_cube.py),
+# loaded once per ETL load version; 'mysql' sends every query to the database
+QUERY_ENGINE = os.getenv("DASHBOARD_QUERY_ENGINE", "mysql")
+
+_version_state = {'version': None, 'checked_at': None}
+_version_lock = threading.Lock()
+
+def _connection_config():
+    """
+    Connection settings: streamlit secrets first, then environment variables.
+    """
+    # Check if secrets file exists before accessing
+    # Or just catch the specific error for secrets
+    try:
+         if hasattr(st, "secrets") and "mysql" in st.secrets:
+             return {
+                "host": st.secrets["mysql"]["host"],
+                "port": st.secrets["mysql"]["port"],
+                "user": st.secrets["mysql"]["user"],
+                "password": st.secrets["mysql"]["password"],
+                "database": st.secrets["mysql"]["database"],
+            }
+    except FileNotFoundError:
+        pass # No secrets file, move to env vars
+    except Exception:
+        pass # Other secrets errors, ignore
+
+    # Fallback to local .env
+    # Ensure we look for .env in the project root
+    env_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".env")
+    load_dotenv(env_path)
+
+    return {
+        "host": os.getenv("DB_HOST", "localhost"),
+        "port": int(os.getenv("DB_PORT", 3306)),
+        "user": os.getenv("DB_USER", "root"),
+        "password": os.getenv("DB_PASSWORD", ""),
+        "database": os.getenv("DB_NAME", "canadian_finance"),
+    }
+
+@st.cache_resource
+def get_pool():
+    """
+    Process-wide connection pool, created once and reused across reruns and sessions.
+    Connections run in autocommit mode: a pooled connection left inside a
+    transaction would keep reading the InnoDB snapshot of its first query,
+    and never see a later ETL load.
+    """
+    return pooling.MySQLConnectionPool(
+        pool_name="dashboard",
+        pool_size=POOL_SIZE,
+        pool_reset_session=False,
+        autocommit=True,
+        **_connection_config()
+    )
+
 def get_connection():
     """
-    Establishes a connection to the MySQL database.
-    Checks streamlit secrets first, then environment variables.
+    Borrows a connection from the pool; close() hands it back.
+    The connection is pinged first and transparently reconnected if the server
+    dropped it while idle. Waits up to POOL_WAIT_SECONDS if every connection is in use.
     """
     try:
-        # Check if secrets file exists before accessing
-        # Or just catch the specific error for secrets
+        pool = get_pool()
+        deadline = time.monotonic() + POOL_WAIT_SECONDS
+        while True:
+            try:
+                connection = pool.get_connection()
+                break
+            except pooling.PoolError:
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.05)
         try:
-             if hasattr(st, "secrets") and "mysql" in st.secrets:
-                 return mysql.connector.connect(
-                    host=st.secrets["mysql"]["host"],
-                    port=st.secrets["mysql"]["port"],
-                    user=st.secrets["mysql"]["user"],
-                    password=st.secrets["mysql"]["password"],
-                    database=st.secrets["mysql"]["database"]
-                )
-        except FileNotFoundError:
-            pass # No secrets file, move to env vars
+            connection.ping(reconnect=True, attempts=2, delay=0)
         except Exception:
-            pass # Other secrets errors, ignore
-
-        # Fallback to local .env
-        # Ensure we look for .env in the project root
-        env_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".env")
-        load_dotenv(env_path)
-        
-        connection = mysql.connector.connect(
-            host=os.getenv("DB_HOST", "localhost"),
-            port=int(os.getenv("DB_PORT", 3306)),
-            user=os.getenv("DB_USER", "root"),
-            password=os.getenv("DB_PASSWORD", ""),
-            database=os.getenv("DB_NAME", "canadian_finance")
-        )
+            connection.close() # Hand it back so the pool doesn't shrink
+            raise
         return connection
     except Exception as e:
         print(f"DEBUG: Database connection error: {e}") # Print to console for debugging
@@ -50,21 +128,205 @@ def get_connection():
              pass
         return None
 
-def run_query(query, params=None):
+@st.cache_resource
+def get_query_cache():
     """
-    Executes a SQL query and returns a pandas DataFrame.
+    Process-wide result cache, see QueryCache.
     """
-    conn = get_connection()
-    if conn:
+    return QueryCache(int(CACHE_MAX_MB * 1024 * 1024))
+
+def get_data_version():
+    """
+    The newest ETL load version, re-read at most every VERSION_CHECK_SECONDS.
+    None if the ETL hasn't published one (or it can't be read), in which case
+    results aren't cached.
+    """
+    with _version_lock:
+        checked_at = _version_state['checked_at']
+        if checked_at is not None and time.monotonic() - checked_at < VERSION_CHECK_SECONDS:
+            return _version_state['version']
+
+    version = None
+    if DATA_BACKEND == "parquet":
         try:
-            df = pd.read_sql(query, conn, params=params)
-            conn.close()
+            version = get_warehouse().current_version()
+        except Exception:
+            pass # get_warehouse reports it on the next query
+    else:
+        conn = get_connection()
+        if conn:
+            try:
+                # A fresh transaction, so MAX() sees loads committed since this
+                # connection last read (a no-op with the pool's autocommit)
+                conn.rollback()
+                cursor = conn.cursor()
+                cursor.execute("SELECT MAX(load_version) FROM etl_load_versions")
+                version = cursor.fetchone()[0]
+                cursor.close()
+            except Exception:
+                pass # Table not there yet: the ETL hasn't run its migrations
+            finally:
+                conn.close()
+
+    with _version_lock:
+        _version_state['version'] = version
+        _version_state['checked_at'] = time.monotonic()
+    return version
+
+@st.cache_resource
+def get_warehouse():
+    """
+    Process-wide DuckDB view of the Parquet export, for DATA_BACKEND 'parquet'.
+    """
+    return ParquetWarehouse(PARQUET_DIR)
+
+def _read_mysql(query, params):
+    conn = get_connection()
+    if not conn:
+        return None
+    try:
+        return pd.read_sql(query, conn, params=params)
+    finally:
+        conn.close()
+
+def _read_parquet(query, params):
+    return get_warehouse().query(query, params)
+
+def run_query(query, params=None, cache=True):
+    """
+    Executes a SQL query on the configured backend (a pooled MySQL connection,
+    or DuckDB over the Parquet export) and returns a pandas DataFrame.
+    Results are cached per ETL load version, so repeated widget interactions
+    are answered from memory until the next load; pass cache=False to bypass.
+    """
+    version = get_data_version() if cache else None
+    query_cache = get_query_cache()
+    if version is not None:
+        query_cache.set_version(version)
+        df = query_cache.get(query, params, version)
+        if df is not None:
             return df
-        except Exception as e:
-            st.error(f"Query failed: {e}")
-            conn.close()
-            return pd.DataFrame()
-    return pd.DataFrame()
+
+    read = _read_parquet if DATA_BACKEND == "parquet" else _read_mysql
+    try:
+        df = read(query, params)
+    except Exception as e:
+        st.error(f"Query failed: {e}")
+        return pd.DataFrame()
+    if df is None:
+        return pd.DataFrame()
+    if version is not None:
+        query_cache.put(query, params, version, df)
+    return df
+
+@st.cache_resource
+def get_window_cache():
+    """
+    Process-wide cache of date-ranged series, see WindowCache.
+    """
+    return WindowCache(WINDOW_CACHE_SERIES)
+
+def run_series_query(key, start_date, end_date, build_query):
+    """
+    Runs a date-ranged series query through the window cache.
+    build_query(start, end) returns (query, params) for an inclusive date range;
+    only the parts of [start_date, end_date] that series `key` doesn't hold yet
+    are queried, so widening the range costs just the added months.
+    Without a load version to invalidate it by, the cache is bypassed.
+    """
+    version = get_data_version()
+    if version is None:
+        return run_query(*build_query(start_date, end_date))
+    window_cache = get_window_cache()
+    window_cache.set_version(version)
+    read = _read_parquet if DATA_BACKEND == "parquet" else _read_mysql
+
+    def fetch(start, end):
+        df = read(*build_query(start, end))
+        if df is None:
+            raise ConnectionError("No database connection")
+        return df
+
+    try:
+        return window_cache.get_range(key, start_date, end_date, version, fetch)
+    except ConnectionError:
+        return pd.DataFrame() # get_connection has already reported it
+    except Exception as e:
+        st.error(f"Query failed: {e}")
+        return pd.DataFrame()
+
+@st.cache_resource
+def get_query_executor():
+    """
+    Process-wide threads for fetch_all. There's no point in more threads than
+    pooled connections: extra queries would only wait for one.
+    """
+    return ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="dashboard-query")
+
+def _run_in_script_context(ctx, func, args):
+    # Lets st.error and the cached resources work from a worker thread
+    add_script_run_ctx(None, ctx)
+    return func(*args)
+
+def fetch_all(requests):
+    """
+    Runs the queries a render needs concurrently, each on its own pooled connection.
+    requests maps a name to (query_function, *args), e.g.
+        {'sales': (get_real_sales_data, province, industry, start, end)}
+    Returns {name: DataFrame} once all of them have finished, so a render waits
+    for its slowest query instead of the sum of them.
+    """
+    if len(requests) <= 1:
+        return {name: func(*args) for name, (func, *args) in requests.items()}
+    executor = get_query_executor()
+    ctx = get_script_run_ctx()
+    futures = {
+        name: executor.submit(_run_in_script_context, ctx, func, args)
+        for name, (func, *args) in requests.items()
+    }
+    return {name: future.result() for name, future in futures.items()}
+
+@st.cache_resource(max_entries=1)
+def _load_cube(version):
+    """
+    Reads the dimensions and fact tables into a DataCube. Cached per load
+    version; only the newest is kept.
+    """
+    start = time.perf_counter()
+    dates = run_query("SELECT date_id, full_date FROM dim_date", cache=False)
+    if dates.empty:
+        raise RuntimeError("dim_date is empty or couldn't be read")
+    cube = DataCube(
+        run_query("SELECT geo_id, province_name FROM dim_geography ORDER BY province_name", cache=False),
+        run_query("SELECT industry_id, industry_name FROM dim_industry ORDER BY industry_name", cache=False),
+        dates,
+        run_query("""
+            SELECT f.geo_id, f.date_id, f.value
+            FROM fact_cpi f
+            JOIN dim_product p ON f.product_id = p.product_id
+            WHERE p.product_name = 'All-items'
+        """, cache=False),
+        run_query("SELECT geo_id, industry_id, date_id, value FROM fact_retail_sales", cache=False),
+    )
+    print(f"Loaded data cube for load version {version}: {cube.nbytes / 1024 / 1024:.1f} MB in {time.perf_counter() - start:.1f}s")
+    return cube
+
+def get_cube():
+    """
+    The in-memory cube for the current load version, or None to use SQL:
+    when QUERY_ENGINE isn't 'cube', when there's no load version to key it on,
+    or when loading it failed (retried on the next call).
+    """
+    if QUERY_ENGINE != "cube":
+        return None
+    version = get_data_version()
+    if version is None:
+        return None
+    try:
+        return _load_cube(version)
+    except Exception as e:
+        print(f"DEBUG: Falling back to SQL, data cube failed to load: {e}")
+        return None
 
 # ---- Constants ----
 VALID_PROVINCES = [
@@ -74,6 +336,32 @@ VALID_PROVINCES = [
     'Saskatchewan', 'Yukon'
 ]
 
+# ---- Metadata ----
+
+def get_metadata_manifest():
+    """
+    Returns the newest manifest the ETL published (geographies, industries with
+    categories, loaded dates per fact table) with its 'load_version',
+    or None if the ETL hasn't published one yet.
+    """
+    df = run_query("SELECT load_version, manifest FROM etl_load_versions ORDER BY load_version DESC LIMIT 1")
+    if df.empty:
+        return None
+    manifest = json.loads(df.iloc[0]['manifest'])
+    manifest['load_version'] = int(df.iloc[0]['load_version'])
+    return manifest
+
+def latest_loaded_date(manifest, fact_table, date_limit):
+    """
+    The latest date loaded into fact_table on or before date_limit, from the
+    manifest instead of a MAX(full_date) scan. None if there isn't one.
+    """
+    if not manifest or fact_table not in manifest['fact_tables']:
+        return None
+    dates = manifest['fact_tables'][fact_table]['dates']
+    i = bisect.bisect_right(dates, str(date_limit)[:10])
+    return dates[i - 1] if i else None
+
 # ---- Reusable Queries ----
 
 def get_provinces(only_provinces=False):
@@ -85,10 +373,20 @@ def get_provinces(only_provinces=False):
 def get_industries():
     return run_query("SELECT industry_name FROM dim_industry ORDER BY industry_name")
 
+def _year(value):
+    """
+    Year of a date or 'YYYY-MM-DD' string, for the f.year partition filters
+    (computed here so the SQL runs unchanged on MySQL and DuckDB).
+    """
+    return int(str(value)[:4])
+
 def get_cpi_data(province, start_date, end_date):
     """
     Fetches aggregate CPI (All-items) for a specific province and date range.
     """
+    cube = get_cube()
+    if cube is not None:
+        return cube.cpi_series(province, start_date, end_date)
     query = """
     SELECT 
         d.full_date as date,
@@ -98,16 +396,24 @@ def get_cpi_data(province, start_date, end_date):
     JOIN dim_geography g ON f.geo_id = g.geo_id
     JOIN dim_product p ON f.product_id = p.product_id
     WHERE g.province_name = %s
+      AND f.year BETWEEN %s AND %s -- prunes partitions
       AND d.full_date BETWEEN %s AND %s
       AND p.product_name = 'All-items'
     ORDER BY d.full_date
     """
-    return run_query(query, (province, start_date, end_date))
+
+    def build_query(start, end):
+        return query, (province, _year(start), _year(end), start, end)
+
+    return run_series_query(('cpi', province), start_date, end_date, build_query)
 
 def get_retail_data(province, industry, start_date, end_date):
     """
     Fetches retail sales for a specific province and industry.
     """
+    cube = get_cube()
+    if cube is not None:
+        return cube.retail_series(province, industry, start_date, end_date)
     query = """
     SELECT 
         d.full_date as date,
@@ -118,123 +424,142 @@ def get_retail_data(province, industry, start_date, end_date):
     JOIN dim_industry i ON f.industry_id = i.industry_id
     WHERE g.province_name = %s
       AND i.industry_name = %s
+      AND f.year BETWEEN %s AND %s -- prunes partitions
       AND d.full_date BETWEEN %s AND %s
     ORDER BY d.full_date
     """
-    return run_query(query, (province, industry, start_date, end_date))
 
-def get_latest_yoy_growth_by_industry(province, date_limit):
+    def build_query(start, end):
+        return query, (province, industry, _year(start), _year(end), start, end)
+
+    return run_series_query(('retail', province, industry), start_date, end_date, build_query)
+
+# Series get_real_sales_data keeps the shape of when downsampling
+REAL_SALES_SERIES = ['sales', 'real_sales', 'cpi']
+
+def get_real_sales_data(province, industry, start_date, end_date, max_points=None):
     """
-    Calculates YoY Nominal Sales growth for all industries in a province.
-    Returns DataFrame: [industry, current_sales, prev_sales, yoy_growth]
+    Fetches nominal sales, All-items CPI and CPI-deflated (real) sales for a
+    province and industry, with their YoY changes, precomputed by the ETL.
+    Only months that have both a sales and a CPI value are returned.
+    With max_points, long ranges are downsampled (LTTB) to at most that many points.
     """
-    # Current period (approx latest month in DB) vs Same month last year
-    # We will pick the latest available date for each industry
+    cube = get_cube()
+    if cube is not None:
+        df = cube.real_sales(province, industry, start_date, end_date)
+        return downsample_frame(df, 'date', REAL_SALES_SERIES, max_points)
     query = """
-    WITH LatestDate AS (
-        SELECT MAX(d.full_date) as max_date 
-        FROM fact_retail_sales f 
-        JOIN dim_date d ON f.date_id = d.date_id
-        WHERE d.full_date <= %s
-    ),
-    CurrentSales AS (
-        SELECT 
-            i.industry_name,
-            f.value as current_value
-        FROM fact_retail_sales f
-        JOIN dim_date d ON f.date_id = d.date_id
-        JOIN dim_geography g ON f.geo_id = g.geo_id
-        JOIN dim_industry i ON f.industry_id = i.industry_id
-        WHERE g.province_name = %s
-          AND d.full_date = (SELECT max_date FROM LatestDate)
-    ),
-    PrevSales AS (
-        SELECT 
-            i.industry_name,
-            f.value as prev_value
-        FROM fact_retail_sales f
-        JOIN dim_date d ON f.date_id = d.date_id
-        JOIN dim_geography g ON f.geo_id = g.geo_id
-        JOIN dim_industry i ON f.industry_id = i.industry_id
-        WHERE g.province_name = %s
-          AND d.full_date = DATE_SUB((SELECT max_date FROM LatestDate), INTERVAL 1 YEAR)
-    )
     SELECT 
-        c.industry_name,
-        c.current_value,
-        p.prev_value,
-        ((c.current_value - p.prev_value) / p.prev_value) * 100 as yoy_growth
-    FROM CurrentSales c
-    JOIN PrevSales p ON c.industry_name = p.industry_name
-    ORDER BY yoy_growth ASC
+        a.ref_month as date,
+        a.sales,
+        a.cpi,
+        a.real_sales,
+        a.sales_yoy,
+        a.cpi_yoy,
+        a.real_sales_yoy
+    FROM agg_real_sales a
+    JOIN dim_geography g ON a.geo_id = g.geo_id
+    JOIN dim_industry i ON a.industry_id = i.industry_id
+    WHERE g.province_name = %s
+      AND i.industry_name = %s
+      AND a.ref_month BETWEEN %s AND %s
+    ORDER BY a.ref_month
     """
-    return run_query(query, (date_limit, province, province))
 
+    def build_query(start, end):
+        return query, (province, industry, start, end)
+
+    df = run_series_query(('real_sales', province, industry), start_date, end_date, build_query)
+    return downsample_frame(df, 'date', REAL_SALES_SERIES, max_points)
+
+def _latest_month_filter(column, table, date_limit, latest_date):
+    """
+    SQL and params pinning `column` to the latest loaded month on or before date_limit.
+    With latest_date (from the metadata manifest) that's a constant; otherwise
+    it is looked up with a MAX() subquery over `table`.
+    """
+    if latest_date is not None:
+        return f"{column} = %s", [latest_date]
+    return f"{column} = (SELECT MAX(ref_month) FROM {table} WHERE ref_month <= %s)", [date_limit]
 
+def get_latest_yoy_growth_by_industry(province, date_limit, latest_date=None):
+    """
+    Calculates YoY Nominal Sales growth for all industries in a province.
+    Returns DataFrame: [industry, current_sales, prev_sales, yoy_growth]
+    Pass latest_date (see latest_loaded_date) to skip looking up the latest month.
+    """
+    cube = get_cube()
+    if cube is not None:
+        return cube.yoy_growth_by_industry(province, date_limit, latest_date)
+    # Latest month in the summary vs the same month last year, both precomputed
+    # by the ETL in agg_retail_yoy, so this is an indexed lookup on (geo, month)
+    month_sql, month_params = _latest_month_filter('a.ref_month', 'agg_retail_yoy', date_limit, latest_date)
+    query = f"""
+    SELECT 
+        i.industry_name,
+        a.current_value,
+        a.prev_value,
+        a.yoy_growth
+    FROM agg_retail_yoy a
+    JOIN dim_geography g ON a.geo_id = g.geo_id
+    JOIN dim_industry i ON a.industry_id = i.industry_id
+    WHERE g.province_name = %s
+      AND {month_sql}
+      AND a.prev_value IS NOT NULL
+    ORDER BY yoy_growth ASC, i.industry_name
+    """
+    return run_query(query, tuple([province] + month_params))
 
-def get_provincial_comparison(industry, date_limit):
+def get_provincial_comparison(industry, date_limit, latest_date=None):
     """
     Compare sales growth across provinces for a specific industry.
     Excludes 'Canada' and cities, strictly filters for provinces/territories.
+    Pass latest_date (see latest_loaded_date) to skip looking up the latest month.
     """
-    # We'll use the VALID_PROVINCES list to filter inside the query or post-process.
-    # Passing the list to SQL IN clause is cleaner.
+    cube = get_cube()
+    if cube is not None:
+        return cube.provincial_comparison(industry, date_limit, latest_date, VALID_PROVINCES)
+    # Passing the VALID_PROVINCES list to SQL IN clause is cleaner than post-processing.
     placeholders = ', '.join(['%s'] * len(VALID_PROVINCES))
+    month_sql, month_params = _latest_month_filter('a.ref_month', 'agg_retail_yoy', date_limit, latest_date)
     
     query = f"""
-    WITH LatestDate AS (
-        SELECT MAX(d.full_date) as max_date 
-        FROM fact_retail_sales f 
-        JOIN dim_date d ON f.date_id = d.date_id
-        WHERE d.full_date <= %s
-    ),
-    CurrentSales AS (
-        SELECT 
-            g.province_name,
-            f.value as current_value
-        FROM fact_retail_sales f
-        JOIN dim_date d ON f.date_id = d.date_id
-        JOIN dim_geography g ON f.geo_id = g.geo_id
-        JOIN dim_industry i ON f.industry_id = i.industry_id
-        WHERE i.industry_name = %s
-          AND d.full_date = (SELECT max_date FROM LatestDate)
-          AND g.province_name IN ({placeholders})
-    ),
-    PrevSales AS (
-        SELECT 
-            g.province_name,
-            f.value as prev_value
-        FROM fact_retail_sales f
-        JOIN dim_date d ON f.date_id = d.date_id
-        JOIN dim_geography g ON f.geo_id = g.geo_id
-        JOIN dim_industry i ON f.industry_id = i.industry_id
-        WHERE i.industry_name = %s
-          AND d.full_date = DATE_SUB((SELECT max_date FROM LatestDate), INTERVAL 1 YEAR)
-          AND g.province_name IN ({placeholders})
-    )
     SELECT 
-        c.province_name,
-        ((c.current_value - p.prev_value) / p.prev_value) * 100 as yoy_growth
-    FROM CurrentSales c
-    JOIN PrevSales p ON c.province_name = p.province_name
-    ORDER BY yoy_growth DESC
-    """
-    # Params: date_limit, industry, *provinces, industry, *provinces
-    params = [date_limit, industry] + VALID_PROVINCES + [industry] + VALID_PROVINCES
+        g.province_name,
+        a.yoy_growth
+    FROM agg_retail_yoy a
+    JOIN dim_geography g ON a.geo_id = g.geo_id
+    JOIN dim_industry i ON a.industry_id = i.industry_id
+    WHERE i.industry_name = %s
+      AND {month_sql}
+      AND a.prev_value IS NOT NULL
+      AND g.province_name IN ({placeholders})
+    ORDER BY yoy_growth DESC, g.province_name
+    """
+    # Params: industry, month, *provinces
+    params = [industry] + month_params + VALID_PROVINCES
     return run_query(query, tuple(params))
 
-def get_industry_distribution(province, date_limit):
+def get_industry_distribution(province, date_limit, latest_date=None):
     """
     Fetches sales data for ALL industries in a province for the latest available date.
     Used for Pie/Donut charts.
+    Pass latest_date (see latest_loaded_date) to skip the MAX(full_date) scan.
     """
-    query = """
-    WITH LatestDate AS (
-        SELECT MAX(d.full_date) as max_date 
-        FROM fact_retail_sales f 
-        JOIN dim_date d ON f.date_id = d.date_id
-        WHERE d.full_date <= %s
-    )
+    cube = get_cube()
+    if cube is not None:
+        return cube.industry_distribution(province, date_limit, latest_date)
+    if latest_date is not None:
+        date_sql, date_params = "f.year = %s AND d.full_date = %s", [_year(latest_date), latest_date]
+    else:
+        date_sql = """d.full_date = (
+            SELECT MAX(d2.full_date)
+            FROM fact_retail_sales f2
+            JOIN dim_date d2 ON f2.date_id = d2.date_id
+            WHERE d2.full_date <= %s
+          )"""
+        date_params = [date_limit]
+    query = f"""
     SELECT 
         i.industry_name,
         f.value as sales
@@ -243,16 +568,19 @@ def get_industry_distribution(province, date_limit):
     JOIN dim_geography g ON f.geo_id = g.geo_id
     JOIN dim_industry i ON f.industry_id = i.industry_id
     WHERE g.province_name = %s
-      AND d.full_date = (SELECT max_date FROM LatestDate)
+      AND {date_sql}
       AND i.industry_name != 'Retail trade [44-45]' -- Exclude the total aggregate
-    ORDER BY sales DESC
+    ORDER BY sales DESC, i.industry_name
     """
-    return run_query(query, (date_limit, province))
+    return run_query(query, tuple([province] + date_params))
 
 def get_seasonal_data(province, industry, end_year):
     """
     Fetches monthly sales data for the last 3 years to show seasonality/trends.
     """
+    cube = get_cube()
+    if cube is not None:
+        return cube.seasonal(province, industry, end_year)
     start_year = end_year - 2
     query = """
     SELECT 
@@ -265,7 +593,7 @@ def get_seasonal_data(province, industry, end_year):
     JOIN dim_industry i ON f.industry_id = i.industry_id
     WHERE g.province_name = %s
       AND i.industry_name = %s
-      AND d.year BETWEEN %s AND %s
+      AND f.year BETWEEN %s AND %s -- prunes partitions
     ORDER BY d.year, d.month
     """
     return run_query(query, (province, industry, start_year, end_year))
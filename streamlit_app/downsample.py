@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+def lttb_indices(x, y, max_points):
+    """
+    Largest-Triangle-Three-Buckets: indices of at most max_points points of
+    the series (x, y) that keep its visual shape. The first and last points
+    are always kept; every bucket in between contributes the point forming
+    the largest triangle with the previously kept point and the next
+    bucket's average. x must be sorted. NaN values are only picked for a
+    bucket with nothing else in it.
+    """
+    n = len(x)
+    if max_points >= n:
+        return np.arange(n)
+    if max_points < 3:
+        # Too few for a bucket: the first point, then the last
+        return np.array([0, n - 1][:max(max_points, 0)], dtype=np.int64)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    valid = ~np.isnan(y)
+    y_filled = np.where(valid, y, 0.0)
+
+    # max_points - 2 buckets over the inner points; bucket i is edges[i]:edges[i + 1]
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    sizes = np.diff(edges)
+    counts = np.add.reduceat(valid[:n - 1], edges[:-1])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg_x = np.add.reduceat(x[:n - 1], edges[:-1]) / sizes
+        avg_y = np.add.reduceat(y_filled[:n - 1], edges[:-1]) / counts
+    # The "next bucket" of the last bucket is the last point
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(max_points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs(
+            (x[a] - next_x[i]) * (y[lo:hi] - y[a])
+            - (x[a] - x[lo:hi]) * (next_y[i] - y[a])
+        )
+        # A NaN neighbour (say, a missing last point) makes every area NaN;
+        # the bucket still gets one of its own valid points
+        area = np.where(np.isnan(area), 0.0, area)
+        a = lo + int(np.argmax(np.where(valid[lo:hi], area, -1.0)))
+        selected[i + 1] = a
+    return selected
+
+def _numeric_axis(values):
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=float)
+    return pd.to_datetime(values).to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(float)
+
+def downsample_frame(df, x, columns, max_points):
+    """
+    At most max_points rows of df (sorted by x), chosen by LTTB so every
+    series in `columns` keeps its shape. All series get the same number of
+    points, the largest for which their merged picks still fit in max_points.
+    The series share their first and last rows, and often their peaks, so
+    this uses more of the budget than an even split would.
+    If even 3 points per series don't fit, only the first series is sampled;
+    a budget below 3 keeps just the first (and last) row.
+    Returns df unchanged if it already fits, or if max_points is None.
+    """
+    if not max_points or len(df) <= max_points:
+        return df
+    if max_points < 3:
+        return df.iloc[[0, len(df) - 1][:max_points]].reset_index(drop=True)
+    xs = _numeric_axis(df[x])
+    ys = [df[column].astype(float).to_numpy() for column in columns]
+
+    def picks(per_series):
+        return np.unique(np.concatenate([lttb_indices(xs, y, per_series) for y in ys]))
+
+    keep = picks(3)
+    if len(keep) > max_points:
+        keep = lttb_indices(xs, ys[0], max_points)
+    else:
+        # Binary search for the largest per-series budget that still fits
+        lo, hi = 3, max_points
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            candidate = picks(mid)
+            if len(candidate) <= max_points:
+                lo, keep = mid, candidate
+            else:
+                hi = mid - 1
+    return df.iloc[keep].reset_index(drop=True)
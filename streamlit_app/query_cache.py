@@ -0,0 +1,82 @@
+import threading
+from collections import OrderedDict
+
+class QueryCache:
+    """
+    Size-bounded LRU cache of query results, keyed on (query, params, data version).
+
+    The data version is the ETL load version: results can only change when the
+    ETL publishes a new one, so entries never expire by time. When the version
+    moves on, every entry from the old version is dropped at once.
+    Sizes are measured with DataFrame.memory_usage(deep=True).
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(query, params, version):
+        if isinstance(params, list):
+            params = tuple(params)
+        return (version, query, params)
+
+    def set_version(self, version):
+        """
+        Records the current data version, clearing the cache if it changed.
+        """
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._bytes = 0
+                self._version = version
+
+    def get(self, query, params, version):
+        """
+        Returns a copy of the cached frame (callers are free to modify it), or None.
+        """
+        key = self._key(query, params, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0].copy()
+
+    def put(self, query, params, version, df):
+        if version != self._version:
+            return
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        if size > self.max_bytes:
+            return
+        key = self._key(query, params, version)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (df.copy(), size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'version': self._version,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,72 @@
+import os
+import re
+import threading
+
+# Optional: only the parquet backend needs it
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+# Written by etl/parquet_export.py: the load version to read
+CURRENT_FILE = "CURRENT"
+
+# db_utils writes MySQL-style %s placeholders; DuckDB takes ?
+_PLACEHOLDER = re.compile(r"%s")
+
+class ParquetWarehouse:
+    """
+    Runs the dashboard's SQL with DuckDB over the Parquet export of the
+    warehouse (etl/parquet_export.py), so no database server is needed.
+
+    Every exported table is a view over <directory>/v<version>/<table>.parquet.
+    When CURRENT names a new version, the views are repointed at it.
+    """
+
+    def __init__(self, directory):
+        if duckdb is None:
+            raise RuntimeError("The parquet backend needs duckdb (uv sync --extra parquet)")
+        self.directory = directory
+        self._conn = duckdb.connect()
+        # Sort NULLs like MySQL: first in ascending order, last in descending
+        self._conn.execute("SET default_null_order = 'nulls_first_on_asc_last_on_desc'")
+        self._version = None
+        self._lock = threading.Lock()
+
+    def current_version(self):
+        """
+        The exported load version named by CURRENT, or None if there isn't one.
+        """
+        try:
+            with open(os.path.join(self.directory, CURRENT_FILE), "r") as f:
+                return int(f.read().strip())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _use_version(self, version):
+        with self._lock:
+            if version == self._version:
+                return
+            path = os.path.join(self.directory, f"v{version}")
+            for filename in sorted(os.listdir(path)):
+                if not filename.endswith(".parquet"):
+                    continue
+                table = filename[:-len(".parquet")]
+                parquet_path = os.path.abspath(os.path.join(path, filename)).replace("'", "''")
+                self._conn.execute(f"CREATE OR REPLACE VIEW {table} AS SELECT * FROM read_parquet('{parquet_path}')")
+            self._version = version
+
+    def query(self, query, params=None):
+        """
+        Executes a db_utils query and returns a DataFrame. Safe to call from
+        several threads: each call gets its own cursor.
+        """
+        version = self.current_version()
+        if version is None:
+            raise RuntimeError(f"No Parquet export found in {self.directory}")
+        self._use_version(version)
+        cursor = self._conn.cursor()
+        try:
+            return cursor.execute(_PLACEHOLDER.sub("?", query), list(params or [])).df()
+        finally:
+            cursor.close()
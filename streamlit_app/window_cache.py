@@ -0,0 +1,166 @@
+import threading
+import datetime
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+ONE_DAY = datetime.timedelta(days=1)
+
+def _as_date(value):
+    return pd.Timestamp(value).date()
+
+def _date_keys(df):
+    return pd.to_datetime(df['date']).to_numpy(dtype='datetime64[D]')
+
+def _concat(held, new):
+    """
+    Appends new rows to a series. A column that is all NULL in one part comes
+    back as object dtype; it takes the other part's float dtype instead, so
+    the merged series keeps stable dtypes.
+    """
+    for column in held.columns.intersection(new.columns):
+        if held[column].dtype == new[column].dtype:
+            continue
+        if pd.api.types.is_float_dtype(held[column]) and new[column].isna().all():
+            new = new.astype({column: held[column].dtype})
+        elif pd.api.types.is_float_dtype(new[column]) and held[column].isna().all():
+            held = held.astype({column: new[column].dtype})
+    return pd.concat([held, new], ignore_index=True)
+
+class _Series:
+    """
+    One cached series: its rows sorted by date, and the date intervals
+    (inclusive, merged) that have been fetched into them.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self.keys = _date_keys(df)
+        self.intervals = []
+
+    def missing(self, start, end):
+        """
+        Sub-ranges of [start, end] not covered by any fetched interval.
+        """
+        gaps = []
+        cursor = start
+        for lo, hi in self.intervals:
+            if hi < cursor:
+                continue
+            if lo > end:
+                break
+            if lo > cursor:
+                gaps.append((cursor, lo - ONE_DAY))
+            cursor = max(cursor, hi + ONE_DAY)
+            if cursor > end:
+                break
+        if cursor <= end:
+            gaps.append((cursor, end))
+        return gaps
+
+    def add(self, start, end, df):
+        if len(df):
+            merged = _concat(self.df, df) if len(self.df) else df.reset_index(drop=True)
+            merged = merged.assign(_key=_date_keys(merged))
+            merged = merged.drop_duplicates('_key', keep='last').sort_values('_key', kind='stable')
+            self.keys = merged['_key'].to_numpy(dtype='datetime64[D]')
+            self.df = merged.drop(columns='_key').reset_index(drop=True)
+        intervals = sorted(self.intervals + [(start, end)])
+        self.intervals = [intervals[0]]
+        for lo, hi in intervals[1:]:
+            last_lo, last_hi = self.intervals[-1]
+            if lo <= last_hi + ONE_DAY:
+                self.intervals[-1] = (last_lo, max(last_hi, hi))
+            else:
+                self.intervals.append((lo, hi))
+
+    def slice(self, start, end):
+        lo = np.searchsorted(self.keys, np.datetime64(start, 'D'), side='left')
+        hi = np.searchsorted(self.keys, np.datetime64(end, 'D'), side='right')
+        # A copy, so callers are free to modify it
+        return self.df.iloc[lo:hi].reset_index(drop=True).copy()
+
+class WindowCache:
+    """
+    LRU cache of date-ranged series, e.g. the CPI of one province.
+
+    Each series remembers which date intervals it holds. A request for a
+    wider range only fetches the sub-ranges it doesn't have and merges them
+    into the sorted series, so widening a date picker by a month costs one
+    month of rows. Like QueryCache, everything is dropped when the data
+    version moves on. At most max_series series are kept.
+    """
+
+    def __init__(self, max_series):
+        self.max_series = max_series
+        self._series = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def set_version(self, version):
+        """
+        Records the current data version, clearing the cache if it changed.
+        """
+        with self._lock:
+            if version != self._version:
+                self._series.clear()
+                self._version = version
+
+    def get_range(self, key, start_date, end_date, version, fetch):
+        """
+        Rows of series `key` dated within [start_date, end_date], sorted by date.
+        fetch(start, end) must return the series' rows (with a 'date' column) for
+        an inclusive sub-range; it is only called for the parts not cached yet.
+        Exceptions from fetch propagate and leave the cache unchanged.
+        """
+        start, end = _as_date(start_date), _as_date(end_date)
+        if start > end:
+            start, end = end, start
+        with self._lock:
+            series = self._series.get(key)
+            gaps = series.missing(start, end) if series is not None else [(start, end)]
+            if series is not None and not gaps:
+                self._series.move_to_end(key)
+                self.hits += 1
+                return series.slice(start, end)
+
+        # Fetch outside the lock; another thread may fill the same gap meanwhile,
+        # which the merge tolerates (rows are de-duplicated by date)
+        fetched = [(lo, hi, fetch(lo, hi)) for lo, hi in gaps]
+
+        with self._lock:
+            if version == self._version:
+                series = self._series.get(key)
+                if series is None:
+                    self.misses += 1
+                    series = self._series[key] = _Series(fetched[0][2].iloc[0:0])
+                else:
+                    self.partial_hits += 1
+                for lo, hi, df in fetched:
+                    series.add(lo, hi, df)
+                self._series.move_to_end(key)
+                while len(self._series) > self.max_series:
+                    self._series.popitem(last=False)
+                    self.evictions += 1
+                if not series.missing(start, end):
+                    return series.slice(start, end)
+
+        # A new load was published, or the series evicted, while fetching: the
+        # gaps no longer complete the range, so read all of it fresh
+        return fetch(start, end).reset_index(drop=True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'version': self._version,
+                'series': len(self._series),
+                'max_series': self.max_series,
+                'hits': self.hits,
+                'partial_hits': self.partial_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,182 @@
+import os
+import re
+import sys
+import json
+import datetime
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "streamlit_app"))
+
+# Optional (the parquet extra): only the warehouse tests need it
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+from etl.loaders.aggregates import RETAIL_YOY_SELECT, REAL_SALES_SELECT
+
+# ---- A small warehouse ----
+#
+# Four geographies, four industries and 42 months, with the awkward cases
+# the dashboard has to get right:
+#   * missing months: Alberta clothing skips 2023-06..2023-08, Yukon has no
+#     CPI for 2023-03, and only Canada and Ontario have 2024-06 retail rows
+#   * NULL values: Ontario food sales for 2023-05, Ontario CPI for 2022-07
+#   * zero prior-year values: Ontario food and gasoline sales for 2023-06,
+#     so 2024-06 has NULL growth for both (a tie), Yukon CPI for 2022-02
+
+GEOGRAPHIES = ['Alberta', 'Canada', 'Ontario', 'Yukon']
+INDUSTRIES = [
+    'Clothing and clothing accessories retailers [458]',
+    'Food and beverage retailers [445]',
+    'Gasoline stations and fuel vendors [457]',
+    'Retail trade [44-45]',
+]
+PRODUCTS = ['All-items', 'Food']
+MONTHS = [datetime.date(2021 + m // 12, m % 12 + 1, 1) for m in range(42)]
+LATEST_MONTH = MONTHS[-1]
+
+# The summary tables, shared with the loader tests' schema
+AGGREGATE_SCHEMA = """
+    CREATE TABLE agg_retail_yoy (
+        geo_id INT, industry_id INT, ref_month DATE,
+        current_value DECIMAL(15, 2), prev_value DECIMAL(15, 2), yoy_growth DECIMAL(12, 4)
+    );
+    CREATE TABLE agg_real_sales (
+        geo_id INT, industry_id INT, ref_month DATE, sales DECIMAL(15, 2), cpi DECIMAL(10, 2),
+        real_sales DECIMAL(18, 2), sales_yoy DECIMAL(12, 4), cpi_yoy DECIMAL(12, 4), real_sales_yoy DECIMAL(12, 4)
+    );
+"""
+
+SCHEMA = """
+    CREATE TABLE dim_date (date_id INT, full_date DATE, year INT, month INT, quarter INT);
+    CREATE TABLE dim_geography (geo_id INT, province_name VARCHAR);
+    CREATE TABLE dim_industry (industry_id INT, industry_name VARCHAR, naics_code VARCHAR);
+    CREATE TABLE dim_product (product_id INT, product_name VARCHAR);
+    CREATE TABLE fact_cpi (cpi_id INT, date_id INT, geo_id INT, product_id INT, year INT, value DECIMAL(10, 2));
+    CREATE TABLE fact_retail_sales (
+        sales_id INT, date_id INT, geo_id INT, industry_id INT, year INT, value DECIMAL(15, 2), unit VARCHAR
+    );
+    CREATE TABLE etl_load_versions (load_version BIGINT, manifest VARCHAR, published_at TIMESTAMP);
+""" + AGGREGATE_SCHEMA
+
+MISSING = object()
+
+def cpi_value(geo, product, month):
+    if (geo, month) == ('Yukon', datetime.date(2023, 3, 1)):
+        return MISSING
+    if (geo, product, month) == ('Ontario', 'All-items', datetime.date(2022, 7, 1)):
+        return None
+    if (geo, month) == ('Yukon', datetime.date(2022, 2, 1)):
+        return 0
+    m = MONTHS.index(month)
+    return round(100 + GEOGRAPHIES.index(geo) * 3 + PRODUCTS.index(product) + m * 0.37 + (m % 5) * 0.11, 2)
+
+def retail_value(geo, industry, month):
+    if month == LATEST_MONTH and geo not in ('Canada', 'Ontario'):
+        return MISSING
+    if geo == 'Alberta' and industry.startswith('Clothing') and datetime.date(2023, 6, 1) <= month <= datetime.date(2023, 8, 1):
+        return MISSING
+    if (geo, month) == ('Ontario', datetime.date(2023, 5, 1)) and industry.startswith('Food'):
+        return None
+    if (geo, month) == ('Ontario', datetime.date(2023, 6, 1)) and industry.startswith(('Food', 'Gasoline')):
+        return 0
+    m = MONTHS.index(month)
+    base = 1000 * (INDUSTRIES.index(industry) + 1) + 250 * GEOGRAPHIES.index(geo)
+    return round(base * (1 + 0.004 * m) + ((m * 37) % 11) * 12.5, 2)
+
+def _duckdb_sql(query):
+    # The ETL's summary queries are MySQL; DuckDB spells DATE_SUB differently
+    return re.sub(r"DATE_SUB\(([\w.]+), INTERVAL 1 YEAR\)", r"CAST(\1 - INTERVAL 1 YEAR AS DATE)", query)
+
+def build_warehouse():
+    """
+    The warehouse above as an in-memory DuckDB database with the MySQL column
+    types, its summary tables filled by the ETL's own queries, and a manifest
+    published as load version 1.
+    """
+    conn = duckdb.connect()
+    conn.execute(SCHEMA)
+    conn.executemany("INSERT INTO dim_date VALUES (?, ?, ?, ?, ?)", [
+        (i + 1, d, d.year, d.month, (d.month - 1) // 3 + 1) for i, d in enumerate(MONTHS)
+    ])
+    conn.executemany("INSERT INTO dim_geography VALUES (?, ?)", [(i + 1, g) for i, g in enumerate(GEOGRAPHIES)])
+    conn.executemany("INSERT INTO dim_industry VALUES (?, ?, NULL)", [(i + 1, n) for i, n in enumerate(INDUSTRIES)])
+    conn.executemany("INSERT INTO dim_product VALUES (?, ?)", [(i + 1, p) for i, p in enumerate(PRODUCTS)])
+
+    cpi, retail = [], []
+    for d, month in enumerate(MONTHS):
+        for g, geo in enumerate(GEOGRAPHIES):
+            for p, product in enumerate(PRODUCTS):
+                value = cpi_value(geo, product, month)
+                if value is not MISSING:
+                    cpi.append((len(cpi) + 1, d + 1, g + 1, p + 1, month.year, value))
+            for i, industry in enumerate(INDUSTRIES):
+                value = retail_value(geo, industry, month)
+                if value is not MISSING:
+                    retail.append((len(retail) + 1, d + 1, g + 1, i + 1, month.year, value, 'Dollars'))
+    conn.executemany("INSERT INTO fact_cpi VALUES (?, ?, ?, ?, ?, ?)", cpi)
+    conn.executemany("INSERT INTO fact_retail_sales VALUES (?, ?, ?, ?, ?, ?, ?)", retail)
+
+    conn.execute("INSERT INTO agg_retail_yoy " + _duckdb_sql(RETAIL_YOY_SELECT))
+    conn.execute("INSERT INTO agg_real_sales " + _duckdb_sql(REAL_SALES_SELECT))
+
+    loaded = {
+        table: sorted({row[1] for row in rows})
+        for table, rows in [('fact_cpi', cpi), ('fact_retail_sales', retail)]
+    }
+    manifest = {
+        'format': 1,
+        'geographies': GEOGRAPHIES,
+        'industries': [{'name': name, 'category': 'General & Other'} for name in INDUSTRIES],
+        'fact_tables': {
+            table: {
+                'min_date': MONTHS[ids[0] - 1].isoformat(),
+                'max_date': MONTHS[ids[-1] - 1].isoformat(),
+                'dates': [MONTHS[i - 1].isoformat() for i in ids],
+            }
+            for table, ids in loaded.items()
+        },
+    }
+    conn.execute("INSERT INTO etl_load_versions VALUES (1, ?, current_timestamp)", [json.dumps(manifest)])
+    return conn
+
+def write_export(conn, directory, version):
+    """
+    Writes every table of conn the way etl/parquet_export.py lays out an
+    export: <directory>/v<version>/<table>.parquet, then CURRENT.
+    """
+    target = os.path.join(directory, f"v{version}")
+    os.makedirs(target)
+    for (table,) in conn.execute("SELECT table_name FROM information_schema.tables").fetchall():
+        conn.execute(f"COPY {table} TO '{os.path.join(target, table)}.parquet' (FORMAT parquet)")
+    with open(os.path.join(directory, "CURRENT"), "w") as f:
+        f.write(str(version))
+
+@pytest.fixture(scope="session")
+def warehouse():
+    pytest.importorskip("duckdb")
+    conn = build_warehouse()
+    yield conn
+    conn.close()
+
+@pytest.fixture
+def dashboard(warehouse, tmp_path, monkeypatch):
+    """
+    db_utils on the parquet backend, reading an export of the warehouse,
+    with every process-wide cache cleared.
+    """
+    pytest.importorskip("streamlit")
+    import db_utils
+
+    write_export(warehouse, str(tmp_path), 1)
+    monkeypatch.setattr(db_utils, "DATA_BACKEND", "parquet")
+    monkeypatch.setattr(db_utils, "PARQUET_DIR", str(tmp_path))
+    monkeypatch.setattr(db_utils, "QUERY_ENGINE", "mysql")
+    monkeypatch.setattr(db_utils, "_version_state", {'version': None, 'checked_at': None})
+    for cached in (db_utils.get_warehouse, db_utils.get_query_cache, db_utils.get_window_cache, db_utils._load_cube):
+        cached.clear()
+    yield db_utils
+    db_utils.get_warehouse.clear()
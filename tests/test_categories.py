@@ -0,0 +1,15 @@
+import sys
+import subprocess
+from conftest import ROOT
+from etl.categories import categorize_industry
+
+def test_categories():
+    assert categorize_industry('Retail trade [44-45]') == "All Retail"
+    assert categorize_industry('Gasoline stations and fuel vendors [457]') == "Automotive & Fuel"
+    assert categorize_industry('Food and beverage retailers [445]') == "Food & Beverage"
+    assert categorize_industry('Something else') == "General & Other"
+
+def test_dashboard_import_does_not_need_the_database_code():
+    # app.py imports etl.categories; it must not drag in etl.db and mysql.connector
+    code = "import sys, etl.categories; assert 'etl.db' not in sys.modules and 'mysql' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
@@ -0,0 +1,86 @@
+import pandas as pd
+from conftest import GEOGRAPHIES, INDUSTRIES, MONTHS
+
+PROVINCES = GEOGRAPHIES + ['Atlantis']
+RANGES = [
+    (MONTHS[0], MONTHS[-1]),
+    ('2022-11-15', '2023-06-30'),
+    ('2023-05-01', '2023-05-01'),
+    ('2030-01-01', '2030-12-31'),
+]
+DATE_LIMITS = ['2099-01-01', '2024-05-31', '2023-06-15', '2021-12-31', '2020-01-01']
+NAME_COLUMNS = ('industry_name', 'province_name')
+
+def _normalize(df):
+    df = df.reset_index(drop=True).copy()
+    for column in df.columns:
+        if column == 'date':
+            df[column] = pd.to_datetime(df[column]).astype('datetime64[ns]')
+        elif column not in NAME_COLUMNS:
+            df[column] = pd.to_numeric(df[column]).astype(float)
+    return df
+
+def _assert_same(dashboard, monkeypatch, func, *args):
+    monkeypatch.setattr(dashboard, "QUERY_ENGINE", "mysql")
+    expected = _normalize(func(*args))
+    monkeypatch.setattr(dashboard, "QUERY_ENGINE", "cube")
+    actual = _normalize(func(*args))
+    assert dashboard.get_cube() is not None
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False, obj=f"{func.__name__}{args}")
+
+def _latest_dates(dashboard, date_limit):
+    """
+    Both ways the dashboard finds the latest month: a lookup in the SQL,
+    or latest_date from the manifest.
+    """
+    manifest = dashboard.get_metadata_manifest()
+    return [None, dashboard.latest_loaded_date(manifest, 'fact_retail_sales', date_limit)]
+
+def test_cpi_series(dashboard, monkeypatch):
+    for province in PROVINCES:
+        for start, end in RANGES:
+            _assert_same(dashboard, monkeypatch, dashboard.get_cpi_data, province, start, end)
+
+def test_retail_series(dashboard, monkeypatch):
+    for province in PROVINCES:
+        for industry in INDUSTRIES + ['Unknown']:
+            for start, end in RANGES:
+                _assert_same(dashboard, monkeypatch, dashboard.get_retail_data, province, industry, start, end)
+
+def test_real_sales(dashboard, monkeypatch):
+    for province in PROVINCES:
+        for industry in INDUSTRIES:
+            for start, end in RANGES:
+                _assert_same(dashboard, monkeypatch, dashboard.get_real_sales_data, province, industry, start, end)
+            _assert_same(dashboard, monkeypatch, dashboard.get_real_sales_data, province, industry, MONTHS[0], MONTHS[-1], 12)
+
+def test_seasonal(dashboard, monkeypatch):
+    for province in PROVINCES:
+        for industry in INDUSTRIES:
+            for end_year in (2021, 2023, 2024, 2030):
+                _assert_same(dashboard, monkeypatch, dashboard.get_seasonal_data, province, industry, end_year)
+
+def test_industry_distribution(dashboard, monkeypatch):
+    for province in PROVINCES:
+        for date_limit in DATE_LIMITS:
+            for latest_date in _latest_dates(dashboard, date_limit):
+                _assert_same(dashboard, monkeypatch, dashboard.get_industry_distribution, province, date_limit, latest_date)
+
+def test_yoy_growth_by_industry(dashboard, monkeypatch):
+    for province in PROVINCES:
+        for date_limit in DATE_LIMITS:
+            for latest_date in _latest_dates(dashboard, date_limit):
+                _assert_same(dashboard, monkeypatch, dashboard.get_latest_yoy_growth_by_industry, province, date_limit, latest_date)
+
+def test_provincial_comparison(dashboard, monkeypatch):
+    for industry in INDUSTRIES:
+        for date_limit in DATE_LIMITS:
+            for latest_date in _latest_dates(dashboard, date_limit):
+                _assert_same(dashboard, monkeypatch, dashboard.get_provincial_comparison, industry, date_limit, latest_date)
+
+def test_null_growth_ties_are_ordered_by_name(dashboard, monkeypatch):
+    for engine in ("mysql", "cube"):
+        monkeypatch.setattr(dashboard, "QUERY_ENGINE", engine)
+        df = dashboard.get_latest_yoy_growth_by_industry('Ontario', '2099-01-01')
+        assert df['yoy_growth'][:2].isna().all()
+        assert list(df['industry_name'][:2]) == sorted(df['industry_name'][:2])
@@ -0,0 +1,120 @@
+import re
+import pytest
+
+duckdb = pytest.importorskip("duckdb")
+pytest.importorskip("streamlit")
+import db_utils
+
+class _Cursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.description = None
+
+    def execute(self, query, params=()):
+        self.connection._begin()
+        duck = self.connection.duck
+        duck.execute(re.sub(r"%s", "?", query), list(params or []))
+        self.description = duck.description
+
+    def fetchone(self):
+        return self.connection.duck.fetchone()
+
+    def fetchall(self):
+        return self.connection.duck.fetchall()
+
+    def close(self):
+        pass
+
+class _PooledConnection:
+    """
+    The parts of a pooled mysql-connector connection that decide what it
+    reads, over a DuckDB connection (which has snapshot isolation too):
+    without autocommit, the first statement opens a transaction whose
+    snapshot lasts until commit() or rollback(), and close() hands the
+    connection back as-is unless the pool resets sessions.
+    """
+
+    def __init__(self, pool, duck, autocommit):
+        self.pool = pool
+        self.duck = duck
+        self.autocommit = autocommit
+        self.in_transaction = False
+
+    def _begin(self):
+        if not self.autocommit and not self.in_transaction:
+            self.duck.execute("BEGIN TRANSACTION")
+            self.in_transaction = True
+
+    def _end(self, statement):
+        if self.in_transaction:
+            self.duck.execute(statement)
+            self.in_transaction = False
+
+    def commit(self):
+        self._end("COMMIT")
+
+    def rollback(self):
+        self._end("ROLLBACK")
+
+    def ping(self, reconnect=False, attempts=1, delay=0):
+        pass
+
+    def cursor(self):
+        return _Cursor(self)
+
+    def close(self):
+        if self.pool.reset_session:
+            self.rollback()
+        self.pool.idle.append(self)
+
+class _MySQLConnectionPool:
+    def __init__(self, duck_database, pool_name, pool_size, pool_reset_session=True, autocommit=False, **config):
+        self.reset_session = pool_reset_session
+        self.idle = [_PooledConnection(self, duck_database.cursor(), autocommit) for _ in range(pool_size)]
+
+    def get_connection(self):
+        if not self.idle:
+            raise db_utils.pooling.PoolError("Failed getting connection; pool exhausted")
+        return self.idle.pop()
+
+@pytest.fixture
+def database(tmp_path):
+    database = duckdb.connect(str(tmp_path / "warehouse.duckdb"))
+    database.execute("CREATE TABLE dim_geography (geo_id INT, province_name VARCHAR)")
+    database.execute("INSERT INTO dim_geography VALUES (1, 'Alberta'), (2, 'Ontario')")
+    database.execute("CREATE TABLE etl_load_versions (load_version BIGINT, manifest VARCHAR)")
+    database.execute("INSERT INTO etl_load_versions VALUES (1, '{}')")
+    yield database
+    database.close()
+
+@pytest.fixture
+def mysql_dashboard(database, monkeypatch):
+    """
+    db_utils on the mysql backend, with one pooled connection (so every query
+    reuses it) backed by `database`.
+    """
+    monkeypatch.setattr(db_utils.pooling, "MySQLConnectionPool", lambda **config: _MySQLConnectionPool(database, **config))
+    monkeypatch.setattr(db_utils, "DATA_BACKEND", "mysql")
+    monkeypatch.setattr(db_utils, "QUERY_ENGINE", "mysql")
+    monkeypatch.setattr(db_utils, "POOL_SIZE", 1)
+    monkeypatch.setattr(db_utils, "VERSION_CHECK_SECONDS", 0)
+    monkeypatch.setattr(db_utils, "_version_state", {'version': None, 'checked_at': None})
+    for cached in (db_utils.get_pool, db_utils.get_query_cache, db_utils.get_window_cache, db_utils._load_cube):
+        cached.clear()
+    yield db_utils
+    db_utils.get_pool.clear()
+
+@pytest.mark.filterwarnings("ignore:pandas only supports SQLAlchemy")
+def test_new_load_version_invalidates_the_cache(mysql_dashboard, database):
+    assert mysql_dashboard.get_data_version() == 1
+    assert list(mysql_dashboard.get_provinces()['province_name']) == ['Alberta', 'Ontario']
+
+    # The ETL loads a geography and publishes version 2 through its own connection
+    etl = database.cursor()
+    etl.execute("INSERT INTO dim_geography VALUES (3, 'Yukon')")
+    etl.execute("INSERT INTO etl_load_versions VALUES (2, '{}')")
+    etl.close()
+
+    assert mysql_dashboard.get_data_version() == 2
+    assert list(mysql_dashboard.get_provinces()['province_name']) == ['Alberta', 'Ontario', 'Yukon']
+    assert mysql_dashboard.get_query_cache().stats()['version'] == 2
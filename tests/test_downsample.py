@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from downsample import lttb_indices, downsample_frame
+
+def random_walk(n, seed=0):
+    return np.cumsum(np.random.default_rng(seed).normal(size=n))
+
+def frame(n, seed=0):
+    return pd.DataFrame({
+        'date': pd.date_range("2000-01-01", periods=n, freq="D"),
+        'sales': random_walk(n, seed),
+        'real_sales': random_walk(n, seed + 1),
+    })
+
+@pytest.mark.parametrize("n, max_points", [(10, 3), (100, 7), (1000, 100), (1001, 1000), (5000, 400)])
+def test_lttb_keeps_max_points_including_the_ends(n, max_points):
+    keep = lttb_indices(np.arange(n), random_walk(n), max_points)
+    assert len(keep) == max_points
+    assert keep[0] == 0 and keep[-1] == n - 1
+    assert (np.diff(keep) > 0).all()
+
+def test_lttb_keeps_a_spike():
+    y = np.zeros(1000)
+    y[637] = 50.0
+    assert 637 in lttb_indices(np.arange(1000), y, 10)
+
+def test_lttb_skips_missing_values():
+    y = random_walk(1000)
+    y[::3] = np.nan
+    keep = lttb_indices(np.arange(1000), y, 50)
+    assert not np.isnan(y[keep[1:-1]]).any()
+
+@pytest.mark.parametrize("max_points, expected", [(2, [0, 99]), (1, [0]), (0, [])])
+def test_lttb_budget_below_three(max_points, expected):
+    assert list(lttb_indices(np.arange(100), random_walk(100), max_points)) == expected
+
+def test_lttb_short_series_is_kept_whole():
+    assert list(lttb_indices(np.arange(5), random_walk(5), 10)) == [0, 1, 2, 3, 4]
+
+@pytest.mark.parametrize("n, max_points", [(500, 3), (500, 5), (500, 6), (1000, 100), (5000, 400)])
+def test_frame_keeps_max_points_including_the_ends(n, max_points):
+    df = frame(n)
+    sampled = downsample_frame(df, 'date', ['sales', 'real_sales'], max_points)
+    assert len(sampled) <= max_points
+    # The budget isn't split evenly: shared picks leave room for more per series
+    assert len(sampled) > max_points // 2
+    assert sampled['date'].is_monotonic_increasing
+    pd.testing.assert_frame_equal(sampled.iloc[[0, -1]].reset_index(drop=True), df.iloc[[0, -1]].reset_index(drop=True))
+
+@pytest.mark.parametrize("max_points, expected", [(2, [0, 499]), (1, [0])])
+def test_frame_budget_below_three(max_points, expected):
+    df = frame(500)
+    sampled = downsample_frame(df, 'date', ['sales', 'real_sales'], max_points)
+    pd.testing.assert_frame_equal(sampled, df.iloc[expected].reset_index(drop=True))
+
+@pytest.mark.parametrize("max_points", [None, 0, 500, 1000])
+def test_frame_is_unchanged_without_a_limit_or_when_it_fits(max_points):
+    df = frame(500)
+    assert downsample_frame(df, 'date', ['sales'], max_points) is df
@@ -0,0 +1,176 @@
+import io
+import os
+import time
+import zipfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+from etl.extractors import main_extractor
+
+TABLE_ID = "18100004"
+CSV = b"REF_DATE,GEO,VALUE\n2024-01,Canada,158.3\n2024-02,Canada,158.8\n"
+
+def make_zip(csv=CSV):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as z:
+        z.writestr(f"{TABLE_ID}.csv", csv)
+        z.writestr(f"{TABLE_ID}_MetaData.csv", b"Cube Title\n")
+    return buffer.getvalue()
+
+class _StatCanHandler(BaseHTTPRequestHandler):
+    """
+    Serves state['body'] for every path, honouring If-None-Match against
+    state['etag']. Each entry of state['script'] misbehaves for one request:
+    'stall' (no response until the read timeout), 'cut' (half the body, then
+    the connection closes), 'slow' (half the body, then a pause) or an HTTP status.
+    """
+
+    def do_GET(self):
+        state = self.server.state
+        state['requests'].append(dict(self.headers))
+        behaviour = state['script'].pop(0) if state['script'] else None
+        if behaviour == 'stall':
+            time.sleep(state['pause'])
+            return
+        if isinstance(behaviour, int):
+            self.send_response(behaviour)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if state['etag'] and self.headers.get("If-None-Match") == state['etag']:
+            self.send_response(304)
+            self.send_header("ETag", state['etag'])
+            self.end_headers()
+            return
+        body = state['body']
+        self.send_response(200)
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Content-Length", str(len(body)))
+        if state['etag']:
+            self.send_header("ETag", state['etag'])
+        self.end_headers()
+        if behaviour in ('cut', 'slow'):
+            self.wfile.write(body[:len(body) // 2])
+            self.wfile.flush()
+            if behaviour == 'cut':
+                return
+            time.sleep(state['pause'])
+            body = body[len(body) // 2:]
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _StatCanHandler)
+    httpd.daemon_threads = True
+    httpd.state = {'body': make_zip(), 'etag': '"v1"', 'script': [], 'requests': [], 'pause': 0.5}
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+@pytest.fixture
+def extractor(tmp_path, monkeypatch):
+    monkeypatch.setattr(main_extractor, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(main_extractor, "BACKOFF_BASE", 0.0)
+    monkeypatch.setattr(main_extractor, "READ_TIMEOUT", 0.2)
+    monkeypatch.setattr(main_extractor, "parquet_enabled", lambda: False)
+    return main_extractor
+
+def fetch(extractor, server, tmp_path, **kwargs):
+    return extractor.fetch_stats_can_data(
+        TABLE_ID, "cpi_monthly.csv",
+        base_url=f"http://127.0.0.1:{server.server_port}",
+        manifest_path=str(tmp_path / "fetch_manifest.json"),
+        **kwargs
+    )
+
+def _leftovers(tmp_path):
+    return [name for name in os.listdir(tmp_path) if name.endswith((".zip", ".part"))]
+
+@pytest.mark.parametrize("failure", ['stall', 'cut', 'slow', 503])
+def test_transient_failures_are_retried(extractor, server, tmp_path, failure):
+    server.state['script'] = [failure]
+    stats = fetch(extractor, server, tmp_path)
+    assert stats is not None and stats['status'] == "downloaded"
+    assert len(server.state['requests']) == 2
+    assert (tmp_path / "cpi_monthly.csv").read_bytes() == CSV
+    assert _leftovers(tmp_path) == []
+
+def test_gives_up_after_max_retries(extractor, server, tmp_path):
+    attempts = extractor.MAX_RETRIES + 1
+    server.state['script'] = ['cut'] * attempts
+    assert fetch(extractor, server, tmp_path) is None
+    assert len(server.state['requests']) == attempts
+    assert not (tmp_path / "cpi_monthly.csv").exists()
+    assert _leftovers(tmp_path) == []
+
+def test_client_errors_are_not_retried(extractor, server, tmp_path):
+    server.state['script'] = [404]
+    assert fetch(extractor, server, tmp_path) is None
+    assert len(server.state['requests']) == 1
+
+def test_closes_the_session_it_creates(extractor, server, tmp_path, monkeypatch):
+    closed = []
+    build_session = extractor.build_session
+
+    def tracked_session(pool_size):
+        session = build_session(pool_size)
+        close = session.close
+        session.close = lambda: (closed.append(session), close())
+        return session
+
+    monkeypatch.setattr(extractor, "build_session", tracked_session)
+    fetch(extractor, server, tmp_path)
+    assert len(closed) == 1
+
+    shared = build_session(1)
+    shared_close = shared.close
+    shared.close = lambda: (closed.append(shared), shared_close())
+    fetch(extractor, server, tmp_path, session=shared)
+    assert len(closed) == 1
+    shared_close()
+
+def test_conditional_fetch_and_content_hash(extractor, server, tmp_path):
+    # First download: extracted, and the ETag and SHA-256 recorded
+    stats = fetch(extractor, server, tmp_path)
+    assert stats['status'] == "downloaded" and stats['changed']
+    csv_path = tmp_path / "cpi_monthly.csv"
+    assert csv_path.read_bytes() == CSV
+    entry = extractor.load_manifest(str(tmp_path / "fetch_manifest.json"))[TABLE_ID]
+    assert entry['etag'] == '"v1"' and entry['sha256'] == stats['sha256']
+    assert 'If-None-Match' not in server.state['requests'][0]
+    extracted_at = csv_path.stat().st_mtime_ns
+
+    # Same ETag: the server answers 304 and nothing is downloaded
+    stats = fetch(extractor, server, tmp_path)
+    assert server.state['requests'][1]['If-None-Match'] == '"v1"'
+    assert stats['status'] == "not_modified" and not stats['changed']
+    assert stats['download_bytes'] == 0
+
+    # New ETag, same bytes: downloaded, but the hash matches so it isn't re-extracted
+    server.state['etag'] = '"v2"'
+    stats = fetch(extractor, server, tmp_path)
+    assert stats['status'] == "unchanged" and not stats['changed']
+    assert stats['download_bytes'] == len(server.state['body'])
+    assert csv_path.stat().st_mtime_ns == extracted_at
+    assert extractor.load_manifest(str(tmp_path / "fetch_manifest.json"))[TABLE_ID]['etag'] == '"v2"'
+
+    # New content: extracted again
+    server.state['etag'] = '"v3"'
+    server.state['body'] = make_zip(CSV + b"2024-03,Canada,159.8\n")
+    stats = fetch(extractor, server, tmp_path)
+    assert stats['status'] == "downloaded" and stats['changed']
+    assert csv_path.read_bytes().endswith(b"159.8\n")
+
+def test_cache_entry_without_its_csv_is_ignored(extractor, server, tmp_path):
+    fetch(extractor, server, tmp_path)
+    os.remove(tmp_path / "cpi_monthly.csv")
+    stats = fetch(extractor, server, tmp_path)
+    assert 'If-None-Match' not in server.state['requests'][1]
+    assert stats['status'] == "downloaded"
+    assert (tmp_path / "cpi_monthly.csv").read_bytes() == CSV
@@ -0,0 +1,177 @@
+import re
+import pandas as pd
+import pytest
+from mysql.connector import Error
+
+duckdb = pytest.importorskip("duckdb")
+from conftest import AGGREGATE_SCHEMA, _duckdb_sql
+from etl.init_mysql import ensure_natural_keys
+from etl.loaders import main_loader
+from etl.loaders.dimension_manager import get_dimension_manager
+from etl.table_specs import TABLE_SPECS
+
+# The tables the loader writes, with the natural keys and DECIMAL scales of sql/schema.sql
+LOADER_SCHEMA = """
+    CREATE SEQUENCE date_ids; CREATE SEQUENCE geo_ids; CREATE SEQUENCE industry_ids; CREATE SEQUENCE product_ids;
+    CREATE TABLE dim_date (date_id INT DEFAULT nextval('date_ids'), full_date DATE UNIQUE, year INT, month INT, quarter INT);
+    CREATE TABLE dim_geography (geo_id INT DEFAULT nextval('geo_ids'), province_name VARCHAR UNIQUE);
+    CREATE TABLE dim_industry (industry_id INT DEFAULT nextval('industry_ids'), industry_name VARCHAR UNIQUE, naics_code VARCHAR);
+    CREATE TABLE dim_product (product_id INT DEFAULT nextval('product_ids'), product_name VARCHAR UNIQUE);
+    CREATE TABLE fact_cpi (
+        date_id INT, geo_id INT, product_id INT, year INT, value DECIMAL(10, 2),
+        UNIQUE (date_id, geo_id, product_id)
+    );
+    CREATE TABLE fact_retail_sales (
+        date_id INT, geo_id INT, industry_id INT, year INT, value DECIMAL(15, 2), unit VARCHAR,
+        UNIQUE (date_id, geo_id, industry_id)
+    );
+""" + AGGREGATE_SCHEMA
+
+def _translate(query):
+    query = _duckdb_sql(query).replace("%s", "?").replace("INSERT IGNORE", "INSERT OR IGNORE")
+    query = query.replace("ON DUPLICATE KEY UPDATE", "ON CONFLICT DO UPDATE SET")
+    return re.sub(r"VALUES\((\w+)\)", r"excluded.\1", query)
+
+class _Cursor:
+    """
+    A mysql-connector cursor over DuckDB, translating the MySQL the loader
+    writes. LOAD DATA LOCAL INFILE fails as it does on a server with
+    local_infile off, so bulk loads take the multi-row INSERT fallback.
+    """
+
+    def __init__(self, duck):
+        self.duck = duck
+
+    def execute(self, query, params=()):
+        if query.lstrip().startswith("LOAD DATA"):
+            raise Error(msg="Loading local data is disabled", errno=3948)
+        self.duck.execute(_translate(query), list(params or []))
+
+    def executemany(self, query, rows):
+        self.duck.executemany(_translate(query), [list(row) for row in rows])
+
+    def fetchone(self):
+        return self.duck.fetchone()
+
+    def fetchall(self):
+        return self.duck.fetchall()
+
+    def close(self):
+        pass
+
+class _Connection:
+    def __init__(self, duck):
+        self.duck = duck
+
+    def cursor(self):
+        return _Cursor(self.duck)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+@pytest.fixture
+def conn():
+    duck = duckdb.connect()
+    duck.execute(LOADER_SCHEMA)
+    get_dimension_manager().reset()
+    yield _Connection(duck)
+    get_dimension_manager().reset()
+    duck.close()
+
+def cpi_frame(values):
+    months = pd.date_range("2024-01-01", periods=len(values), freq="MS")
+    return pd.DataFrame({'date': months, 'geography': 'Canada', 'product': 'All-items', 'value': values})
+
+def retail_frame(values, industry='Retail trade [44-45]'):
+    months = pd.date_range("2024-01-01", periods=len(values), freq="MS")
+    return pd.DataFrame({'date': months, 'geography': 'Canada', 'industry': industry, 'value': values})
+
+def load(conn, frames, mode):
+    main_loader.load_dimensions(conn, frames)
+    return main_loader.load_fact(conn, frames, mode=mode, workers=1)
+
+def stored(conn, table):
+    return [float(v) for (v,) in conn.duck.execute(f"SELECT value FROM {table} ORDER BY date_id").fetchall()]
+
+def test_second_identical_incremental_load_writes_nothing(conn):
+    # More decimals than DECIMAL(10, 2) keeps: stored rounded, they still compare equal
+    frames = [(TABLE_SPECS['cpi'], cpi_frame([157.456, 0.1 + 0.2, 158.0]))]
+    assert load(conn, frames, 'incremental')['rows'] == 3
+    assert stored(conn, 'fact_cpi') == [157.46, 0.3, 158.0]
+
+    assert load(conn, frames, 'incremental')['rows'] == 0
+
+    frames = [(TABLE_SPECS['cpi'], cpi_frame([157.456, 0.3, 158.01]))]
+    assert load(conn, frames, 'incremental')['rows'] == 1
+    assert stored(conn, 'fact_cpi') == [157.46, 0.3, 158.01]
+
+@pytest.mark.parametrize("mode", ['insert', 'bulk', 'incremental'])
+def test_reloading_never_duplicates_rows(conn, mode):
+    frames = [(TABLE_SPECS['cpi'], cpi_frame([157.4, 157.9]))]
+    load(conn, frames, mode)
+    load(conn, [(TABLE_SPECS['cpi'], cpi_frame([157.5, 157.9]))], mode)
+    assert stored(conn, 'fact_cpi') == [157.5, 157.9]
+
+def test_overlapping_keys_resolve_to_the_last_spec(conn):
+    frames = [
+        (TABLE_SPECS['retail_industry'], retail_frame([100.0, 200.0])),
+        (TABLE_SPECS['retail_province'], retail_frame([111.0, 222.0])),
+    ]
+    stats = load(conn, frames, 'incremental')
+    assert stats['rows'] == 2
+    assert stored(conn, 'fact_retail_sales') == [111.0, 222.0]
+
+class _ScriptedCursor:
+    """
+    Records statements and answers fetchone() with the next scripted row.
+    """
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.statements = []
+        self.rowcount = 0
+
+    def execute(self, query, params=()):
+        self.statements.append(" ".join(query.split()))
+
+    def fetchone(self):
+        return self.replies.pop(0)
+
+    def close(self):
+        pass
+
+class _ScriptedConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.commits = 0
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        self.commits += 1
+
+def test_natural_key_is_added_after_removing_duplicates():
+    cursor = _ScriptedCursor([
+        (0,), ('cpi_id',),  # fact_cpi: no natural key yet
+        (0,), None,         # fact_retail_sales: doesn't exist yet
+    ])
+    conn = _ScriptedConnection(cursor)
+    ensure_natural_keys(conn)
+
+    writes = [s for s in cursor.statements if not s.startswith("SELECT")]
+    assert len(writes) == 2
+    delete, alter = writes
+    assert delete.startswith("DELETE f FROM fact_cpi f")
+    assert "SELECT date_id, geo_id, product_id, MAX(cpi_id) AS keep_id" in delete
+    assert "WHERE f.cpi_id <> d.keep_id" in delete
+    assert alter == "ALTER TABLE fact_cpi ADD UNIQUE KEY uq_fact_cpi_natural (date_id, geo_id, product_id)"
+    assert conn.commits == 1
+
+def test_existing_natural_keys_are_left_alone():
+    cursor = _ScriptedCursor([(1,), (1,)])
+    ensure_natural_keys(_ScriptedConnection(cursor))
+    assert all(s.startswith("SELECT") for s in cursor.statements)
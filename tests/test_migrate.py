@@ -0,0 +1,30 @@
+import pytest
+
+from etl.migrate import split_sql
+
+@pytest.mark.parametrize("script, expected", [
+    ("SELECT 1; SELECT 2;", ["SELECT 1", "SELECT 2"]),
+    ("SELECT 1;\n\n;  ;\nSELECT 2", ["SELECT 1", "SELECT 2"]),
+    # Semicolons inside quotes and backticks
+    ("INSERT INTO t VALUES ('a;b'); SELECT 2", ["INSERT INTO t VALUES ('a;b')", "SELECT 2"]),
+    ('SELECT "x;y"; SELECT 2', ['SELECT "x;y"', "SELECT 2"]),
+    ("SELECT `odd;name` FROM t; SELECT 2", ["SELECT `odd;name` FROM t", "SELECT 2"]),
+    # Escaped and doubled quotes don't close the string
+    (r"SELECT 'it\'s; fine'; SELECT 2", [r"SELECT 'it\'s; fine'", "SELECT 2"]),
+    (r'SELECT "say \"hi;\""; SELECT 2', [r'SELECT "say \"hi;\""', "SELECT 2"]),
+    ("SELECT 'it''s; fine'; SELECT 2", ["SELECT 'it''s; fine'", "SELECT 2"]),
+    (r"SELECT 'C:\\'; SELECT 2", [r"SELECT 'C:\\'", "SELECT 2"]),
+    # A backslash is not an escape inside backticks
+    ("SELECT `a\\`; SELECT 2", ["SELECT `a\\`", "SELECT 2"]),
+    # Semicolons inside comments, which are dropped
+    ("SELECT 1 -- one; two\n; SELECT 2", ["SELECT 1", "SELECT 2"]),
+    ("SELECT 1 # one; two\n; SELECT 2", ["SELECT 1", "SELECT 2"]),
+    ("SELECT /* one; two */ 1; SELECT 2", ["SELECT   1", "SELECT 2"]),
+    ("SELECT 1;\n/* a;\n   b; */\nSELECT 2;", ["SELECT 1", "SELECT 2"]),
+    ("SELECT 1; -- trailing; comment", ["SELECT 1"]),
+    ("SELECT 1; /* unterminated; comment", ["SELECT 1"]),
+    # Comment markers inside quotes are text
+    ("SELECT '-- not; a comment', '#;', '/*;*/'; SELECT 2", ["SELECT '-- not; a comment', '#;', '/*;*/'", "SELECT 2"]),
+])
+def test_split_sql(script, expected):
+    assert split_sql(script) == expected
@@ -0,0 +1,104 @@
+import datetime
+import pandas as pd
+import pytest
+from conftest import GEOGRAPHIES, INDUSTRIES, LATEST_MONTH, MONTHS, build_warehouse, cpi_value, retail_value, write_export
+
+FOOD = 'Food and beverage retailers [445]'
+GAS = 'Gasoline stations and fuel vendors [457]'
+TOTAL = 'Retail trade [44-45]'
+
+def _dates(df, column='date'):
+    return list(pd.to_datetime(df[column]).dt.date)
+
+def test_version_and_manifest(dashboard):
+    assert dashboard.get_data_version() == 1
+    manifest = dashboard.get_metadata_manifest()
+    assert manifest['load_version'] == 1
+    assert manifest['geographies'] == GEOGRAPHIES
+    assert dashboard.latest_loaded_date(manifest, 'fact_retail_sales', '2099-01-01') == LATEST_MONTH.isoformat()
+
+def test_dimensions(dashboard):
+    assert list(dashboard.get_provinces()['province_name']) == GEOGRAPHIES
+    assert list(dashboard.get_provinces(only_provinces=True)['province_name']) == ['Alberta', 'Ontario', 'Yukon']
+    assert list(dashboard.get_industries()['industry_name']) == INDUSTRIES
+
+def test_cpi_series(dashboard):
+    df = dashboard.get_cpi_data('Yukon', '2022-11-15', '2023-06-30')
+    # 2023-03 has no Yukon CPI row
+    expected = [m for m in MONTHS if datetime.date(2022, 12, 1) <= m <= datetime.date(2023, 6, 1) and m.month != 3]
+    assert _dates(df) == expected
+    assert list(df['cpi'].astype(float)) == [cpi_value('Yukon', 'All-items', m) for m in expected]
+
+def test_retail_series_with_gaps_and_nulls(dashboard):
+    df = dashboard.get_retail_data('Alberta', INDUSTRIES[0], '2023-01-01', '2023-12-31')
+    assert [d.month for d in _dates(df)] == [1, 2, 3, 4, 5, 9, 10, 11, 12]
+
+    df = dashboard.get_retail_data('Ontario', FOOD, '2023-04-01', '2023-06-01')
+    assert _dates(df) == [datetime.date(2023, 4, 1), datetime.date(2023, 5, 1), datetime.date(2023, 6, 1)]
+    assert pd.isna(df['sales'].iloc[1])
+    assert float(df['sales'].iloc[2]) == 0
+
+def test_series_widening_reuses_the_cached_range(dashboard):
+    dashboard.get_cpi_data('Ontario', '2022-01-01', '2022-12-31')
+    df = dashboard.get_cpi_data('Ontario', '2021-06-01', '2022-12-31')
+    assert _dates(df) == [m for m in MONTHS if datetime.date(2021, 6, 1) <= m <= datetime.date(2022, 12, 1)]
+    assert pd.isna(df.loc[pd.to_datetime(df['date']) == '2022-07-01', 'cpi']).all()
+    assert dashboard.get_window_cache().stats()['partial_hits'] == 1
+
+def test_real_sales(dashboard):
+    df = dashboard.get_real_sales_data('Yukon', GAS, '2022-01-01', '2023-12-31')
+    # Only months with both a sales and a CPI row
+    assert datetime.date(2023, 3, 1) not in _dates(df)
+    feb = df[pd.to_datetime(df['date']) == '2022-02-01'].iloc[0]
+    assert float(feb['cpi']) == 0 and pd.isna(feb['real_sales'])
+    dec = df[pd.to_datetime(df['date']) == '2023-12-01'].iloc[0]
+    sales, cpi = retail_value('Yukon', GAS, datetime.date(2023, 12, 1)), cpi_value('Yukon', 'All-items', datetime.date(2023, 12, 1))
+    assert float(dec['real_sales']) == pytest.approx(sales / (cpi / 100), abs=0.005)
+
+    df = dashboard.get_real_sales_data('Canada', TOTAL, MONTHS[0], LATEST_MONTH, max_points=10)
+    assert len(df) == 10
+    assert _dates(df)[0] == MONTHS[0] and _dates(df)[-1] == LATEST_MONTH
+
+def test_seasonal(dashboard):
+    df = dashboard.get_seasonal_data('Alberta', INDUSTRIES[0], 2023)
+    assert list(df['year'].drop_duplicates()) == [2021, 2022, 2023]
+    assert len(df) == 36 - 3
+
+def test_industry_distribution(dashboard):
+    # The latest loaded month, 2024-06, has no Alberta rows
+    assert dashboard.get_industry_distribution('Alberta', '2099-01-01').empty
+    df = dashboard.get_industry_distribution('Alberta', '2024-05-31')
+    assert TOTAL not in set(df['industry_name'])
+    assert list(df['sales'].astype(float)) == sorted(
+        (retail_value('Alberta', name, datetime.date(2024, 5, 1)) for name in INDUSTRIES if name != TOTAL), reverse=True
+    )
+
+def test_yoy_growth_by_industry(dashboard):
+    df = dashboard.get_latest_yoy_growth_by_industry('Ontario', '2099-01-01', LATEST_MONTH.isoformat())
+    assert len(df) == len(INDUSTRIES)
+    # Zero prior-year sales: no growth, NULLs first as in MySQL, tied rows by name
+    assert list(df['industry_name'][:2]) == [FOOD, GAS]
+    assert df['yoy_growth'][:2].isna().all()
+    assert df['yoy_growth'][2:].is_monotonic_increasing
+
+    # A NULL prior-year value drops the row
+    df = dashboard.get_latest_yoy_growth_by_industry('Ontario', '2024-05-31')
+    assert FOOD not in set(df['industry_name'])
+
+def test_provincial_comparison(dashboard):
+    df = dashboard.get_provincial_comparison(TOTAL, '2099-01-01')
+    # Latest month overall is 2024-06, loaded for Canada (not a province) and Ontario only
+    assert list(df['province_name']) == ['Ontario']
+    df = dashboard.get_provincial_comparison(TOTAL, '2024-05-31')
+    assert df['yoy_growth'].is_monotonic_decreasing
+    assert set(df['province_name']) == {'Alberta', 'Ontario', 'Yukon'}
+
+def test_new_export_version_is_picked_up(dashboard, tmp_path, monkeypatch):
+    assert 'Nunavut' not in set(dashboard.get_provinces()['province_name'])
+    conn = build_warehouse()
+    conn.execute("INSERT INTO dim_geography VALUES (5, 'Nunavut')")
+    write_export(conn, str(tmp_path), 2)
+    conn.close()
+    monkeypatch.setattr(dashboard, "VERSION_CHECK_SECONDS", 0)
+    assert dashboard.get_data_version() == 2
+    assert 'Nunavut' in set(dashboard.get_provinces()['province_name'])